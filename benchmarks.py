@@ -0,0 +1,299 @@
+'''Small benchmarks for the pipeline.
+
+Usage:
+    python benchmarks.py startup                      # import cost of gg_api, lazy vs eager resources
+    python benchmarks.py startup --autograder hosts   # import autograder and run only the stages it grades
+    python benchmarks.py profiles                     # per-stage spaCy docs/sec, full vs trimmed pipeline
+    python benchmarks.py awards                       # award_patterns: loop of re.findall vs AwardMatcher
+    python benchmarks.py routing                      # tweet -> award category: per-award loop vs AwardIndex
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+#************ startup ***************
+# every measurement runs in a fresh interpreter so nothing is already imported or loaded
+
+def _startup_child(opts: dict) -> dict:
+    out = {}
+    t0 = time.perf_counter()
+    module = "autograder" if opts["autograder"] is not None else "gg_api"
+    __import__(module)
+    out["import_s"] = time.perf_counter() - t0
+    out["import_rss_mb"] = peak_rss_mb()
+
+    from nlp_pipeline import resources
+    if opts["eager"]:
+        # what importing the pipeline used to cost: every model loaded up front
+        t = time.perf_counter()
+        resources.load_all()
+        out["eager_s"] = time.perf_counter() - t
+
+    stages = {}
+    if opts["autograder"]:
+        import gg_api
+        for stage in opts["autograder"]:
+            t = time.perf_counter()
+            getattr(gg_api, "get_%s" % stage)(gg_api.YEAR)
+            stages[stage] = time.perf_counter() - t
+    out["stages_s"] = stages
+    out["total_s"] = time.perf_counter() - t0
+    out["rss_mb"] = peak_rss_mb()
+    out["loaded"] = resources.loaded()
+    return out
+
+
+def _run_child(opts: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_child", json.dumps(opts)],
+        capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(p for p in (HERE, os.environ.get("PYTHONPATH")) if p)},
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"benchmark child failed ({proc.returncode})")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def startup(args) -> None:
+    label = "autograder" if args.autograder is not None else "gg_api"
+    if args.autograder:
+        label += " (" + ", ".join(args.autograder) + ")"
+    modes = [("lazy", False)] + ([("eager", True)] if args.eager else [])
+
+    for name, eager in modes:
+        runs = [_run_child({"autograder": args.autograder, "eager": eager}) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["total_s"])
+        print(f"{label} [{name}]")
+        print(f"  import:   {best['import_s']:.2f}s, peak rss {best['import_rss_mb']:.0f} MB")
+        if eager:
+            print(f"  load all: {best['eager_s']:.2f}s")
+        for stage, secs in best["stages_s"].items():
+            print(f"  get_{stage}: {secs:.2f}s")
+        print(f"  total:    {best['total_s']:.2f}s, peak rss {best['rss_mb']:.0f} MB")
+        loaded = ", ".join(f"{n} ({s:.2f}s)" for n, s in best["loaded"]) or "none"
+        print(f"  resources loaded: {loaded}")
+
+
+#************ profiles ***************
+# every extractor declares what it reads from a doc (SPACY_NEEDS); this times the full
+# en_core_web_sm pipeline against the trimmed one on texts that stage actually parses
+
+def _stage_texts(path: str):
+    from corpus import get_corpus
+    from nlp_pipeline import extract_awards, extract_nominees, extract_presenters, extract_winners
+    import performance
+    from tags import PERFORMANCE, PRESENTER
+
+    corpus = get_corpus(path)
+    distinct = [g for g in corpus.unique("text") if g.key]
+    return [
+        ("nominees", extract_nominees.SPACY_NEEDS,
+         [g.key for g in corpus.unique(extract_nominees.to_text) if g.key and extract_nominees.wants_doc(g.tweet)]),
+        ("winners", extract_winners.SPACY_NEEDS,
+         [g.key for g in corpus.unique(extract_winners.to_text) if g.key and extract_winners.wants_doc(g.tweet)]),
+        ("performance", performance.SPACY_NEEDS,
+         [g.key for g in distinct if g.tweet.tags & PERFORMANCE]),
+        ("presenters", extract_presenters.SPACY_NEEDS,
+         [g.key for g in distinct if g.tweet.tags & PRESENTER]),
+        ("awards", extract_awards.SPACY_NEEDS,
+         [g.key for g in distinct if "best" in g.key.lower()]),
+    ]
+
+
+def _readout(doc, needs):
+    # just the parts of the doc a stage with these needs looks at
+    out = [tok.text for tok in doc]
+    if "ents" in needs:
+        out.append([(e.text, e.label_, e.start, e.end) for e in doc.ents])
+    if "pos" in needs:
+        out.append([tok.pos_ for tok in doc])
+    return out
+
+
+def _docs_per_sec(nlp, texts, batch_size):
+    t0 = time.perf_counter()
+    docs = list(nlp.pipe(texts, batch_size=batch_size))
+    secs = time.perf_counter() - t0
+    return docs, (len(texts) / secs if secs > 0 else 0.0)
+
+
+def profiles(args) -> None:
+    from nlp_pipeline.resources import spacy_nlp
+
+    full = spacy_nlp()
+    print(f"full pipeline: {', '.join(full.pipe_names)}")
+    print(f"{'stage':<12} {'needs':<10} {'docs':>6} {'full/s':>9} {'trim/s':>9} {'speedup':>8}  same  components")
+    for stage, needs, texts in _stage_texts(args.path):
+        texts = texts[:args.limit]
+        if not texts:
+            print(f"{stage:<12} (no texts)")
+            continue
+        trimmed = spacy_nlp(needs)
+        # warm up both so the first batch doesn't count model/vocab setup
+        list(full.pipe(texts[:20]))
+        list(trimmed.pipe(texts[:20]))
+        full_docs, full_rate = _docs_per_sec(full, texts, args.batch_size)
+        trim_docs, trim_rate = _docs_per_sec(trimmed, texts, args.batch_size)
+        same = all(_readout(a, needs) == _readout(b, needs) for a, b in zip(full_docs, trim_docs))
+        speedup = trim_rate / full_rate if full_rate else 0.0
+        print(f"{stage:<12} {'+'.join(needs):<10} {len(texts):>6} {full_rate:>9,.0f} {trim_rate:>9,.0f} "
+              f"{speedup:>7.2f}x  {'yes' if same else 'NO ':<4}  {', '.join(trimmed.pipe_names)}")
+
+
+#************ awards ***************
+# extract_awards.extract used to run every award pattern over every "best" tweet; the
+# matcher only runs the patterns whose trigger words occur. both must find the same phrases
+
+def _findall_loop(texts):
+    import re
+    from nlp_pipeline.extract_awards import award_patterns
+    return [[m for pattern in award_patterns for m in re.findall(pattern, text, flags=re.IGNORECASE)]
+            for text in texts]
+
+
+def _findall_matcher(texts):
+    from nlp_pipeline.extract_awards import award_matcher
+    return [award_matcher.findall(text) for text in texts]
+
+
+def awards(args) -> None:
+    import re
+    from corpus import get_corpus
+
+    best = re.compile(r"\bbest\b", re.IGNORECASE)
+    texts = [t for t in get_corpus(args.path).texts() if t and best.search(t)]
+    print(f"{len(texts)} tweets mentioning 'best'")
+    results = {}
+    for name, run in (("loop", _findall_loop), ("matcher", _findall_matcher)):
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[name] = run(texts)
+            times.append(time.perf_counter() - t0)
+        secs = min(times)
+        print(f"  {name:<8} {secs * 1000:8.1f} ms  ({len(texts) / secs if secs else 0:,.0f} tweets/s)")
+    same = results["loop"] == results["matcher"]
+    found = sum(len(r) for r in results["loop"])
+    print(f"  {found} matches, same in both: {'yes' if same else 'NO'}")
+
+
+#************ routing ***************
+# the nominee and winner extractors map each gated tweet to one award category; the loops
+# scored every tweet against every award with difflib, the index batches it (AwardIndex)
+
+def _route_loop(lows, award_names):
+    from difflib import SequenceMatcher
+    from nlp_pipeline import extract_nominees as N, extract_winners as W
+    nominees, winners = [], []
+    for low in lows:
+        phrase = N.slice_best_phrase(low, max_tokens=8) or low
+        scores = [(0.7 * N.token_overlap(phrase, a)
+                   + 0.3 * SequenceMatcher(None, N.normalize(phrase), N.normalize(a)).ratio(), a)
+                  for a in award_names]
+        best_sc, best_aw = max(scores, key=lambda x: x[0])
+        nominees.append(best_aw if best_sc >= 0.35 else None)
+
+        best, best_sc = None, 0.0
+        for aw in award_names:
+            sc = W.token_overlap(low, aw)
+            if sc > best_sc:
+                best, best_sc = aw, sc
+        if best_sc < 0.55:
+            sl = W.slice_best_phrase(low) or ""
+            f_best, f_sc = None, -1.0
+            for aw in (award_names if sl else ()):
+                sc = W.fuzzy_ratio(sl, aw)
+                if sc > f_sc:
+                    f_best, f_sc = aw, sc
+            if f_best and f_sc >= 72:
+                best = f_best
+            elif best_sc < 0.35:
+                best = None
+        winners.append(best)
+    return nominees, winners
+
+
+def _route_index(lows, award_names):
+    from nlp_pipeline import extract_nominees as N, extract_winners as W
+    phrases = [N.slice_best_phrase(low, max_tokens=8) or low for low in lows]
+    nominees = N.route_phrases(phrases, award_names)
+    winners = W.route_awards(lows, award_names)
+    return [nominees[p] for p in phrases], [winners[low] for low in lows]
+
+
+def routing(args) -> None:
+    from corpus import get_corpus
+    from gg_api import AWARD_NAMES
+    from nlp_pipeline import extract_nominees, extract_winners
+
+    lows = [g.key.lower() for g in get_corpus(args.path).unique(extract_winners.to_text)
+            if extract_winners.wants_doc(g.tweet) or extract_nominees.wants_doc(g.tweet)]
+    print(f"{len(lows)} gated tweets, {len(AWARD_NAMES)} awards")
+    results = {}
+    for name, run in (("loop", _route_loop), ("index", _route_index)):
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[name] = run(lows, AWARD_NAMES)
+            times.append(time.perf_counter() - t0)
+        secs = min(times)
+        print(f"  {name:<8} {secs * 1000:8.1f} ms  ({len(lows) / secs if secs else 0:,.0f} tweets/s)")
+    same = results["loop"] == results["index"]
+    routed = sum(r is not None for r in results["loop"][1])
+    print(f"  {routed} routed by the winner rules, same in both: {'yes' if same else 'NO'}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("startup", help="import time and memory, and which models get loaded")
+    p.add_argument("--autograder", nargs="*", metavar="STAGE",
+                   help="import autograder.py and run these gg_api stages the way it does "
+                        "(hosts, awards, nominees, presenters, winner); run from the data directory")
+    p.add_argument("--eager", action="store_true",
+                   help="also measure loading every resource up front, like the old module-level loads")
+    p.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement (best is shown)")
+    p.set_defaults(func=startup)
+
+    p = sub.add_parser("profiles", help="spaCy docs/sec per stage, full vs trimmed pipeline")
+    p.add_argument("--path", default="tweets_cleaned.jsonl", help="cleaned tweets (run pre_ceremony first)")
+    p.add_argument("--limit", type=int, default=2000, help="texts per stage")
+    p.add_argument("--batch-size", type=int, default=256)
+    p.set_defaults(func=profiles)
+
+    p = sub.add_parser("awards", help="award_patterns matching, per-pattern re.findall vs AwardMatcher")
+    p.add_argument("--path", default="tweets_cleaned.jsonl", help="cleaned tweets (run pre_ceremony first)")
+    p.add_argument("--repeat", type=int, default=5, help="runs per variant (best is shown)")
+    p.set_defaults(func=awards)
+
+    p = sub.add_parser("routing", help="tweet -> award routing, per-award difflib loop vs AwardIndex")
+    p.add_argument("--path", default="tweets_cleaned.jsonl", help="cleaned tweets (run pre_ceremony first)")
+    p.add_argument("--repeat", type=int, default=3, help="runs per variant (best is shown)")
+    p.set_defaults(func=routing)
+
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "_child":
+        print(json.dumps(_startup_child(json.loads(argv[1]))))
+        return
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
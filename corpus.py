@@ -0,0 +1,308 @@
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from shards import open_catalog
+from tags import tag_texts
+from tweet_store import TimeIndex, dt_to_ms, open_store
+
+# one in-memory copy of the cleaned tweets, shared by every stage of gg_api.main()
+# get_corpus(path) parses tweets_cleaned.jsonl (or maps the columnar store) the first
+# time it's asked for, afterwards every extractor gets the same object back
+
+DEFAULT_PATH = "tweets_cleaned.jsonl"
+
+
+class Tweet(NamedTuple):
+    id: Optional[int]
+    timestamp: Optional[datetime]   # naive local time, same as the jsonl iso string
+    epoch: Optional[float]          # seconds since epoch
+    screen_name: Optional[str]
+    user_id: Optional[int]
+    text: str                       # cleaned text
+    text_lower: str
+    text_original: str
+    hashtags: Tuple[str, ...]       # only present in data_extract.py output
+    is_retweet: bool
+    tags: int                       # topic bitmask, see tags.py
+
+    def get(self, key, default=None):
+        # dict-style access for code written against the raw jsonl rows
+        value = getattr(self, key, default)
+        return default if value is None else value
+
+
+class UniqueText(NamedTuple):
+    key: object                     # whatever the tweets were grouped by (usually the cleaned text)
+    tweet: Tweet                    # first occurrence, in file order
+    count: int                      # how many tweets share the key
+    first: Optional[datetime]
+    last: Optional[datetime]
+    retweets: int
+
+
+def looks_like_retweet(t: Tweet) -> bool:
+    return t.is_retweet or t.text_original[:3].lower() == "rt "
+
+
+def _parse_ts(ts: Optional[str]) -> Optional[datetime]:
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+
+
+def tweet_from_row(row: dict) -> Tweet:
+    text = row.get("text") or ""
+    original = row.get("text_original") or ""
+    dt = _parse_ts(row.get("timestamp"))
+    # time shards carry the mask already, plain jsonl rows get tagged here
+    tags = row.get("tags")
+    return Tweet(
+        id=row.get("id"),
+        timestamp=dt,
+        epoch=dt.timestamp() if dt else None,
+        screen_name=row.get("screen_name"),
+        user_id=row.get("user_id"),
+        text=text,
+        text_lower=text.lower(),
+        text_original=original,
+        hashtags=tuple(row.get("hashtags") or ()),
+        is_retweet=bool(row.get("is_retweet")),
+        tags=tags if tags is not None else tag_texts(text, original),
+    )
+
+
+def tags_of(row) -> int:
+    """Topic bitmask of a corpus tweet, a raw jsonl dict or a bare string."""
+    if isinstance(row, Tweet):
+        return row.tags
+    if isinstance(row, dict):
+        return row["tags"] if "tags" in row else tag_texts(row.get("text") or "", row.get("text_original") or "")
+    if isinstance(row, str):
+        return tag_texts(row)
+    return 0
+
+
+class TweetCorpus:
+    """The cleaned tweets of one run, in file order."""
+
+    def __init__(self, tweets: List[Tweet], path: Optional[str] = None, index: Optional[TimeIndex] = None):
+        self.tweets = tweets
+        self.path = path
+        self._unique: Dict[str, List[UniqueText]] = {}
+        self._first: Dict[str, Dict[object, int]] = {}
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self.tweets)
+
+    def __iter__(self) -> Iterator[Tweet]:
+        return iter(self.tweets)
+
+    def __getitem__(self, i):
+        return self.tweets[i]
+
+    def texts(self) -> List[str]:
+        return [t.text for t in self.tweets]
+
+    def time_index(self) -> TimeIndex:
+        # comes from the store when there is one, otherwise sorted here once
+        if self._index is None:
+            self._index = TimeIndex.build([dt_to_ms(t.timestamp) if t.timestamp is not None else -1
+                                           for t in self.tweets])
+        return self._index
+
+    def window_rows(self, start: datetime, end: datetime) -> np.ndarray:
+        """Row numbers of the tweets with start <= timestamp < end, in file order."""
+        return self.time_index().rows_between(start, end)
+
+    def between(self, start: datetime, end: datetime) -> Iterator[Tweet]:
+        """Tweets with start <= timestamp < end, in file order; untimed tweets are skipped."""
+        tweets = self.tweets
+        for i in self.window_rows(start, end).tolist():
+            yield tweets[i]
+
+    def first_rows(self, field: str = "text") -> Dict[object, int]:
+        """field value -> row of its first occurrence, for first-occurrence checks inside a window."""
+        if field not in self._first:
+            first: Dict[object, int] = {}
+            for i, t in enumerate(self.tweets):
+                first.setdefault(getattr(t, field), i)
+            self._first[field] = first
+        return self._first[field]
+
+    def unique(self, key: Union[str, Callable[[Tweet], object]] = "text") -> List[UniqueText]:
+        """Group identical tweets so NLP work scales with distinct texts, not total tweets.
+
+        key is a Tweet field name or a function of the tweet; groups come back in order
+        of first occurrence, so count-weighted tallies match a pass over every tweet.
+        """
+        if isinstance(key, str) and key in self._unique:
+            return self._unique[key]
+        get = (lambda t, f=key: getattr(t, f)) if isinstance(key, str) else key
+
+        groups: Dict[object, list] = {}
+        for t in self.tweets:
+            k = get(t)
+            g = groups.get(k)
+            if g is None:
+                groups[k] = [t, 0, t.timestamp, t.timestamp, 0]
+                g = groups[k]
+            g[1] += 1
+            if t.timestamp is not None:
+                if g[2] is None or t.timestamp < g[2]:
+                    g[2] = t.timestamp
+                if g[3] is None or t.timestamp > g[3]:
+                    g[3] = t.timestamp
+            if looks_like_retweet(t):
+                g[4] += 1
+        out = [UniqueText(k, *g) for k, g in groups.items()]
+        if isinstance(key, str):
+            self._unique[key] = out
+        return out
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "TweetCorpus":
+        store = open_store(path)
+        if store is not None:
+            return cls(_tweets_from_store(store), path, store.time_index())
+
+        tweets = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        tweets.append(tweet_from_row(json.loads(line)))
+                    except Exception:
+                        pass
+        except FileNotFoundError:
+            print(f"could not find {path}; did pre_ceremony() run?")
+        return cls(tweets, path)
+
+
+def _tweets_from_store(store) -> List[Tweet]:
+    cols = store.columns(("id", "timestamp_ms", "screen_name", "user_id", "text", "text_original"))
+    ids = cols["id"].tolist()
+    stamps = cols["timestamp_ms"].tolist()
+    users = cols["user_id"].tolist()
+    tags = store.tags().tolist()
+    tweets = []
+    for i, (name, text, orig) in enumerate(zip(cols["screen_name"], cols["text"], cols["text_original"])):
+        ms = stamps[i]
+        dt = datetime.fromtimestamp(ms / 1000.0) if ms >= 0 else None
+        tweets.append(Tweet(
+            id=ids[i] if ids[i] >= 0 else None,
+            timestamp=dt,
+            epoch=ms / 1000.0 if dt else None,
+            screen_name=name or None,
+            user_id=users[i] if users[i] >= 0 else None,
+            text=text,
+            text_lower=text.lower(),
+            text_original=orig,
+            hashtags=(),
+            is_retweet=False,
+            tags=tags[i],
+        ))
+    return tweets
+
+
+def write_unique(corpus: TweetCorpus, path: str) -> int:
+    """Write one line per distinct cleaned text with its multiplicity; returns the line count."""
+    groups = corpus.unique("text")
+    with open(path, "w", encoding="utf-8") as f:
+        for g in groups:
+            f.write(json.dumps({
+                "text": g.key,
+                "count": g.count,
+                "first": g.first.isoformat() if g.first else None,
+                "last": g.last.isoformat() if g.last else None,
+                "retweets": g.retweets,
+            }, ensure_ascii=False) + "\n")
+    return len(groups)
+
+
+# module-level registry: path -> (file signature, corpus)
+_CORPORA: Dict[str, Tuple[tuple, TweetCorpus]] = {}
+
+
+def _signature(path: str) -> tuple:
+    try:
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
+    except OSError:
+        return (None, None)
+
+
+def loaded_corpus(path: str = DEFAULT_PATH) -> Optional[TweetCorpus]:
+    """The shared corpus for path if some stage already loaded it, else None."""
+    hit = _CORPORA.get(os.path.abspath(path))
+    if hit is not None and hit[0] == _signature(path):
+        return hit[1]
+    return None
+
+
+def get_corpus(path: str = DEFAULT_PATH) -> TweetCorpus:
+    """Return the shared corpus for path, loading it on first use (or if the file changed)."""
+    key = os.path.abspath(path)
+    sig = _signature(path)
+    hit = _CORPORA.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    corpus = TweetCorpus.load(path)
+    _CORPORA[key] = (sig, corpus)
+    return corpus
+
+
+def clear_corpus_cache() -> None:
+    _CORPORA.clear()
+
+
+# window-restricted stages go through these two so they can run off the time shards
+# (shards.py) without ever loading the whole corpus; if the corpus is already in memory,
+# or there are no shards, they use it instead
+
+def stream(path: str = DEFAULT_PATH) -> Iterator[Tweet]:
+    """Every tweet once, in no particular order."""
+    corpus = loaded_corpus(path)
+    if corpus is None:
+        catalog = open_catalog(path)
+        if catalog is not None:
+            return (tweet_from_row(row) for row in catalog.iter_rows())
+        corpus = get_corpus(path)
+    return iter(corpus)
+
+
+def window(path: str, start: datetime, end: datetime, dedup: bool = False) -> List[Tweet]:
+    """Tweets with start <= timestamp < end, in file order.
+
+    dedup=True keeps a tweet only if it's the first one in the whole corpus with its cleaned text.
+    """
+    corpus = loaded_corpus(path)
+    if corpus is None:
+        catalog = open_catalog(path)
+        if catalog is not None:
+            rows = []
+            for part in catalog.overlapping(start, end):
+                for row in catalog.read(part):
+                    if dedup and not row["first"]:
+                        continue
+                    t = tweet_from_row(row)
+                    if start <= t.timestamp < end:
+                        rows.append((row["row"], t))
+            rows.sort(key=lambda r: r[0])
+            return [t for _, t in rows]
+        corpus = get_corpus(path)
+
+    rows = corpus.window_rows(start, end).tolist()
+    if dedup:
+        first = corpus.first_rows("text")
+        rows = [i for i in rows if first[corpus[i].text] == i]
+    return [corpus[i] for i in rows]
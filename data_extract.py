@@ -1,32 +1,31 @@
 import json
-import pandas as pd
+import os
 import re
 import datetime
 from ftfy import fix_text
 from unidecode import unidecode
-from langdetect import detect, detect_langs
+from lang_filter import LanguageFilter, detect_english
 from tqdm import tqdm
+from functools import lru_cache
+from json_stream import iter_raw_tweets
+from preprocess import CLEAN_CACHE_SIZE, needs_text_fix
+
+# processes used for the langdetect tier of the language filter (see lang_filter.py)
+LANG_WORKERS = 1
+# tweets classified per batch
+LANG_BATCH = 5000
 
 def is_english(text, threshold=0.5):
-    if not text or text.strip() == "":
-        return False
-    try:
-        langs = detect_langs(text)
-        if not langs:
-            return False
-        top = langs[0]
-        # result = top.lang == 'en' and top.prob >= threshold
-        # if not result:
-        #     print(text)
-        #     print(langs[0])
-        return top.lang == 'en' and top.prob >= threshold
-    except Exception:
-        return False
+    # single-tweet check straight through langdetect; the main loop uses the batched LanguageFilter
+    return detect_english(text, threshold)
 
 # Clean text
+# memoized: retweets and copy-pasted tweets hit the cache instead of redoing ftfy/unidecode
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
 def clean_text(text):
-    text = fix_text(text)
-    text = unidecode(text)
+    if needs_text_fix(text):
+        text = fix_text(text)
+        text = unidecode(text)
     text = re.sub(r"http\S+", "", text)                 # remove URLs
     text = re.sub(r"(@\w+)|(#\w+)|\brt\b", "", text)    # remove mentions, hashtags, RT     
     text = re.sub(r"[^a-zA-Z0-9\s]", " ", text)         # remove punctuation
@@ -77,48 +76,60 @@ def parse_retweet(text):
 if __name__ == "__main__":
 
     file_path = "gg2013.json"
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
+    if not os.path.exists(file_path) and os.path.exists(file_path + ".zip"):
+        file_path += ".zip"
 
     ## Store in jsonl
+    # stream the raw array and write each kept tweet as we go instead of
+    # holding the whole dump (and a dataframe copy of it) in memory;
+    # tweets are language-filtered in batches so langdetect can run in a process pool
     output_file = "tweets_cleaned.jsonl"
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    tweet_num = len(data)
-    tweets = []
-    for t in tqdm(data, desc="Pre-processing: "):
-        
-        text = t["text"]
-        retweet_info = parse_retweet(text)
-        
-        if retweet_info["is_retweet"]:
-            cleaned = retweet_info["original_text"]
-        elif retweet_info["is_quote"]:
-            text_to_clean = retweet_info["user_comment"]
-            cleaned = clean_text(text_to_clean)
-        else:
-            cleaned = clean_text(text)
-        
-        hashtags = re.findall(r"#(\w+)", text)  # extract hashtags without '#'
-        
-        # Skip if not English or empty
-        if not is_english(cleaned):
-            continue
-        
-        tweets.append({
-            "timestamp": datetime.datetime.fromtimestamp(t["timestamp_ms"]/1000.0).isoformat(),
-            "screen_name": t["user"]["screen_name"],
-            "user_id": t["user"]["id"],
-            "text": cleaned,
-            "hashtags": hashtags,
-            **retweet_info
-        })
-
-    df = pd.DataFrame(tweets)
-    # df = df.sort_values(by="timestamp", ascending=True)
-    df.to_json(output_file, orient="records", lines=True, force_ascii=False)
-    print(f"Saved {len(df)} tweets to {output_file}")
-            
+    saved = 0
+    lang = LanguageFilter(workers=LANG_WORKERS)
+
+    def flush(batch, out):
+        keep = lang.classify([rec["text"] for rec, _ in batch], [raw for _, raw in batch])
+        n = 0
+        for (rec, _), ok in zip(batch, keep):
+            # Skip if not English or empty
+            if ok:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                n += 1
+        return n
+
+    with open(output_file, "w", encoding="utf-8") as out:
+        batch = []
+        for t in tqdm(iter_raw_tweets(file_path), desc="Pre-processing: "):
+
+            text = t["text"]
+            retweet_info = parse_retweet(text)
+
+            if retweet_info["is_retweet"]:
+                cleaned = retweet_info["original_text"]
+            elif retweet_info["is_quote"]:
+                text_to_clean = retweet_info["user_comment"]
+                cleaned = clean_text(text_to_clean)
+            else:
+                cleaned = clean_text(text)
+
+            hashtags = re.findall(r"#(\w+)", text)  # extract hashtags without '#'
+
+            batch.append(({
+                "timestamp": datetime.datetime.fromtimestamp(int(t["timestamp_ms"])/1000.0).isoformat(),
+                "screen_name": t["user"]["screen_name"],
+                "user_id": t["user"]["id"],
+                "text": cleaned,
+                "hashtags": hashtags,
+                **retweet_info
+            }, text))
+            if len(batch) >= LANG_BATCH:
+                saved += flush(batch, out)
+                batch = []
+        if batch:
+            saved += flush(batch, out)
+    lang.close()
+
+    print(f"Saved {saved} tweets to {output_file}")
+    lang.report()
+    info = clean_text.cache_info()
+    print(f"clean_text cache: {info.hits} hits / {info.misses} misses")
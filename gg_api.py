@@ -1,9 +1,21 @@
 '''Version 0.5'''
 from nlp_pipeline.extract_awards import extract_awards
 from nlp_pipeline.extract_presenters import extract_presenters
+from corpus import get_corpus
 # Year of the Golden Globes ceremony being analyzed
 YEAR = "2013"
 
+# Number of processes pre_ceremony() uses to clean tweets (1 = serial)
+CLEAN_WORKERS = 1
+
+# spaCy batching for pre_ceremony and the nominee/winner extractors (n_process > 1 parses in several processes)
+NLP_BATCH_SIZE = 256
+NLP_PROCESSES = 1
+
+# Minutes per time shard pre_ceremony() splits the cleaned tweets into (None = no shards)
+# Hosts, humor and red carpet then only read the shards overlapping their window
+SHARD_MINUTES = None
+
 # Global variable for hardcoded award names
 # This list is used by get_nominees(), get_winner(), and get_presenters() functions
 # as the keys for their returned dictionaries
@@ -37,22 +49,6 @@ AWARD_NAMES = [
     "best performance by an actor in a television series - comedy or musical",
 ]
 
-def _load_jsonl(path: str):
-    rows = []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rows.append(json.loads(line))
-                except Exception:
-                    pass
-    except FileNotFoundError:
-        print(f"could not find {path}; did pre_ceremony() run?")
-    return rows
-
 def get_hosts(year):
 
     '''Returns the host(s) of the Golden Globes ceremony for the given year.
@@ -138,15 +134,19 @@ def get_nominees(year):
         - Each value should be a list of strings, even if there's only one nominee
     '''
     # Your code here
-    from nlp_pipeline.extract_nominees import extract_nominees
-    tweets = _load_jsonl("tweets_cleaned.jsonl")
+    from nlp_pipeline.extract_nominees import extract_nominees, to_text
+    # each distinct text once, weighted by how often it was tweeted
+    groups = get_corpus("tweets_cleaned.jsonl").unique(to_text)
     awards_for_extractor = [a.strip().lower() for a in AWARD_NAMES]
 
     out = extract_nominees(
-        tweets=tweets,
+        tweets=[g.tweet for g in groups],
         award_names=awards_for_extractor,
         top_k=4,
         debug=False,
+        weights=[g.count for g in groups],
+        batch_size=NLP_BATCH_SIZE,
+        n_process=NLP_PROCESSES,
     )
     # ensure every award key exists even if empty
     return {aw: out.get(aw, []) for aw in awards_for_extractor}
@@ -172,15 +172,19 @@ def get_winner(year):
         - Each value should be a single string (the winner's name)
     '''
     # Your code here
-    from nlp_pipeline.extract_winners import extract_winners
-    tweets = _load_jsonl("tweets_cleaned.jsonl")
+    from nlp_pipeline.extract_winners import dedup_key, extract_winners
+    # each distinct text once, weighted by how often it was tweeted
+    groups = get_corpus("tweets_cleaned.jsonl").unique(dedup_key)
     awards_for_extractor = [a.strip().lower() for a in AWARD_NAMES]
 
     # run winner extractor 
     raw_winners = extract_winners(
-        tweets=tweets,
+        tweets=[g.tweet for g in groups],
         award_names=awards_for_extractor,
         debug=False,
+        weights=[g.count for g in groups],
+        batch_size=NLP_BATCH_SIZE,
+        n_process=NLP_PROCESSES,
     )
     # make sure every key exists and every value is a string
     winners_out = {}
@@ -221,7 +225,7 @@ def get_presenters(year):
     presenters_out = extract_presenters(data_path, AWARD_NAMES)
     return {aw: presenters_out.get(aw, []) for aw in AWARD_NAMES}
 
-def pre_ceremony():
+def pre_ceremony(workers=None, force=False, shard_minutes=None):
     '''Pre-processes and loads data for the Golden Globes analysis.
     
     This function should be called before any other functions to:
@@ -236,77 +240,131 @@ def pre_ceremony():
         - Do NOT change the name of this function or what it returns
         - This function should handle all one-time setup tasks
         - Print progress messages to help with debugging
+
+    Args:
+        workers (int, optional): processes used for cleaning; defaults to CLEAN_WORKERS.
+            Output is identical for any worker count.
+        force (bool, optional): re-clean everything even if the input hasn't changed
+            since the last run (see the manifest next to tweets_cleaned.jsonl).
+        shard_minutes (int, optional): also write tweets_cleaned.shards/ with one file per
+            this many minutes; defaults to SHARD_MINUTES. Shards from an earlier run are
+            removed whenever the tweets are cleaned again.
     '''
-    import io
-    import json
-    import re
-    import zipfile
-    from datetime import datetime
-    from ftfy import fix_text
-    import unidecode as _unidecode
+    import os
+    import shutil
+    import time
+    from json_stream import iter_raw_tweets
+    from preprocess import (
+        CLEANER_VERSION, clean_records, hashing, input_state, manifest_path_for, new_records_hasher,
+        plan_update, record_line, report_worker_stats, skip_known_prefix, write_manifest,
+    )
+    from tweet_store import TweetStoreWriter, open_store, store_dir_for
+    from corpus import write_unique
+    from shards import open_catalog, shard_dir_for, write_shards
+    from tags import TAGS_VERSION
+    from nlp_pipeline.doc_cache import build_doc_cache, doc_cache_path_for, extractor_needs, texts_for_extractors
+
+    if workers is None:
+        workers = CLEAN_WORKERS
+    if shard_minutes is None:
+        shard_minutes = SHARD_MINUTES
+
+    def shard(corpus_path):
+        parts = write_shards(get_corpus(corpus_path), corpus_path, minutes=shard_minutes)
+        print(f"Pre-ceremony: {parts} shards of {shard_minutes} min written to {shard_dir_for(corpus_path)}/")
+
+    def parse_docs(corpus_path):
+        # run spacy once over every distinct text the extractors will parse that isn't cached
+        # from an earlier run (see nlp_pipeline/doc_cache.py)
+        t = time.perf_counter()
+        reused, parsed = build_doc_cache(texts_for_extractors(get_corpus(corpus_path)), extractor_needs(),
+                                         doc_cache_path_for(corpus_path),
+                                         batch_size=NLP_BATCH_SIZE, n_process=NLP_PROCESSES)
+        print(f"Pre-ceremony: parsed {parsed} texts with spaCy in {time.perf_counter() - t:.1f}s "
+              f"({reused} already in {doc_cache_path_for(corpus_path)})")
 
     # look for raw data in the current dir
     input_candidates = ["gg2013.json.zip", "gg2013.json"]
-    in_path = next((p for p in input_candidates if __import__("os").path.exists(p)), None)
+    in_path = next((p for p in input_candidates if os.path.exists(p)), None)
     if in_path is None:
         print("WARNING: raw file not found. Put gg2013.json.zip or gg2013.json next to gg_api.py")
         return
 
-    # regex + dash normalization to '-'
-    url_re = re.compile(r"https?://\S+")
-    mention_re = re.compile(r"@\w+")
-    hashtag_re = re.compile(r"#\w+")
-    dash_map = dict.fromkeys(map(ord, "–—‐−‒"), ord("-"))
-
-    def _clean(text: str) -> str:
-        if not text:
-            return ""
-        text = fix_text(text)
-        text = _unidecode.unidecode(text)
-        text = text.translate(dash_map)                 # keep hyphens
-        text = url_re.sub("", text)
-        text = re.sub(r"\brt\b", "", text, flags=re.IGNORECASE)
-        text = mention_re.sub("", text)
-        text = hashtag_re.sub("", text)
-        # remove punctuation except -
-        text = re.sub(r"[^A-Za-z0-9\s\-]", " ", text)
-        text = " ".join(text.split())
-        return text
-
-    def _iter_records():
-        if in_path.endswith(".zip"):
-            with zipfile.ZipFile(in_path) as zf:
-                inner = zf.namelist()[0]  
-                with zf.open(inner, "r") as fh:
-                    yield from json.load(io.TextIOWrapper(fh, encoding="utf-8"))
+    out_path = "tweets_cleaned.jsonl"
+
+    # compare against the manifest from the last run: skip, append new tweets, or redo everything
+    existing = open_store(out_path)
+    if force:
+        mode, manifest = "full", None
+    else:
+        mode, manifest = plan_update(in_path, out_path, existing.rows if existing else None)
+    if mode == "skip":
+        print(f"Pre-ceremony: {in_path} unchanged since last run ({manifest['records']} tweets), nothing to clean")
+        if existing.meta.get("tags_version") != TAGS_VERSION:
+            # the keyword gates in tags.py changed: re-tag, no need to re-clean
+            existing.refresh_tags()
+            print(f"Pre-ceremony: re-tagged {existing.rows} tweets")
+        catalog = open_catalog(out_path)
+        if shard_minutes and (catalog is None or catalog.minutes != shard_minutes):
+            shard(out_path)
+        parse_docs(out_path)
+        print("Pre-ceremony processing complete.")
+        return
+
+    # size/mtime/digest for the new manifest, taken before cleaning starts (only when there is
+    # cleaning to do: the digest reads the whole dump, and the skip check above only needs a stat)
+    state = input_state(in_path)
+
+    hasher = new_records_hasher()
+    records = iter_raw_tweets(in_path)
+    kept = 0
+    if mode == "append":
+        if skip_known_prefix(records, manifest["records"], manifest["records_digest"], hasher):
+            kept = manifest["records"]
+            print(f"Pre-ceremony: {in_path} grew since last run, cleaning only the new tweets after the first {kept}")
         else:
-            with open(in_path, "r", encoding="utf-8") as fh:
-                yield from json.load(fh)
+            # earlier tweets changed too, start over
+            mode = "full"
+            hasher = new_records_hasher()
+            records = iter_raw_tweets(in_path)
+
+    # the shards are a copy of the old output; the catalog only checks the file size, which a
+    # re-clean can leave the same, so drop them now and write them again below if asked for
+    shutil.rmtree(shard_dir_for(out_path), ignore_errors=True)
 
     wrote = 0
-    with open("tweets_cleaned.jsonl", "w", encoding="utf-8") as out:
-        for t in _iter_records():
-            raw_text = t.get("text") or ""
-            cleaned = _clean(raw_text)
-
-            ts_ms = t.get("timestamp_ms")
-            try:
-                ts_iso = datetime.fromtimestamp(int(ts_ms) / 1000.0).isoformat() if ts_ms else None
-            except Exception:
-                ts_iso = None
-
-            rec = {
-                "id": t.get("id"),
-                "timestamp": ts_iso,
-                "screen_name": (t.get("user") or {}).get("screen_name"),
-                "user_id": (t.get("user") or {}).get("id"),
-                "text": cleaned,           # cleaned, hyphen-preserved text for extraction
-                "text_original": raw_text  # optional: for debugging
-            }
-            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    stats = {}
+    t0 = time.perf_counter()
+    # the columnar store is what the later stages read back (see tweet_store.py)
+    store = TweetStoreWriter(store_dir_for(out_path), append=(mode == "append"))
+    with open(out_path, "a" if mode == "append" else "w", encoding="utf-8") as out:
+        # stream the raw array so memory stays flat no matter how big the dump is;
+        # with workers > 1 cleaning runs in a process pool but records come back in order
+        for rec, ts_ms in clean_records(hashing(records, hasher), workers=workers, stats=stats):
+            out.write(record_line(rec))
+            store.append(rec, ts_ms)
             wrote += 1
-
-    print(f"Pre-ceremony: wrote {wrote} cleaned tweets to tweets_cleaned.jsonl")
+    store.close(out_path)
+
+    write_manifest(manifest_path_for(out_path), {
+        **state,
+        "cleaner_version": CLEANER_VERSION,
+        "records": kept + wrote,
+        "records_digest": hasher.hexdigest(),
+        "output_size": os.path.getsize(out_path),
+    })
+
+    # one row per distinct cleaned text with its count, first/last time and retweets
+    unique = write_unique(get_corpus(out_path), "tweets_unique.jsonl")
+    if shard_minutes:
+        shard(out_path)
+
+    elapsed = time.perf_counter() - t0
+    print(f"Pre-ceremony: cleaned {wrote} tweets with {workers} worker(s) in {elapsed:.1f}s")
+    report_worker_stats(stats)
+    print(f"Pre-ceremony: {out_path} and {store_dir_for(out_path)}/ now hold {kept + wrote} cleaned tweets")
+    print(f"Pre-ceremony: {unique} distinct texts written to tweets_unique.jsonl")
+    parse_docs(out_path)
     print("Pre-ceremony processing complete.")
     return
 
@@ -335,6 +393,10 @@ def main():
     # run preprocessing first
     pre_ceremony()
 
+    # parse the cleaned tweets once; every stage below shares this corpus
+    corpus = get_corpus("tweets_cleaned.jsonl")
+    print(f"Loaded {len(corpus)} cleaned tweets")
+
     print("Extracting hosts...")
     hosts = get_hosts(YEAR)
 
@@ -347,6 +409,9 @@ def main():
     print("Extracting presenters...")
     presenters = get_presenters(YEAR)
 
+    from nlp_pipeline.doc_cache import get_doc_cache
+    print(f"spaCy docs: {get_doc_cache().stats()}")
+
     output = {"Host": hosts, "Year": YEAR}
     for award in AWARD_NAMES:
         output[award] = {
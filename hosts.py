@@ -1,12 +1,12 @@
-import json, re
+import re
 from collections import Counter
 from datetime import datetime, timedelta
 from typing import Iterable, List, Tuple
 
-host_verbs = re.compile(
-    r"\b(hosts?|hosting|hosted|your hosts|our hosts|please welcome|opening monologue)\b",
-    re.IGNORECASE,
-)
+from corpus import Tweet, stream, window
+from tags import HOST
+
+#host_verbs lives in tags.py - every tweet is tagged HOST once when the corpus is loaded
 
 all_names = r"[A-Z][a-z']+"
 name_chunk = re.compile(rf"\b({all_names}\s+{all_names}(?:\s+{all_names})?)\b")
@@ -14,35 +14,26 @@ name_pair  = re.compile(rf"\b({all_names}\s+{all_names})\s+(?:&|and)\s+({all_nam
 
 
 
-def load_clean_tweets(path: str) -> Iterable[dict]: 
-    #want it to be a generator so we dont just return all tweets in a list
-    #loads tweets - yields a dict
-    with open(path, "r", encoding = "utf-8") as f:
-        for line in f:
-            if line.strip():
-                yield json.loads(line)
-
-def to_datetime(timestamp: str) -> datetime:
-    #so we can add time/compare times
-    return datetime.fromisoformat(timestamp) 
-
-def find_window(tweets: Iterable[dict], window_minutes: int = 40):
+def find_window(tweets: Iterable[Tweet], window_minutes: int = 40):
     #want to return a window of estimate of when the hosting ceremony is
     per_min = Counter()
     first = None
     last = None
+    earliest = None #earliest tweet of any kind, in case nothing looks host related
 
     #first pass - build up per_min
+    #single pass so tweets can be a stream (e.g. read shard by shard)
     for t in tweets:
-        text = t.get("text", "")
-        hashtags = t.get("hashtags", []) or []
-        if not text:
+        if t.timestamp is not None and (earliest is None or t.timestamp < earliest):
+            earliest = t.timestamp
+        text = t.text
+        if not text or t.timestamp is None:
             continue
-        host_likely = bool(host_verbs.search(text)) or any("host" in h.lower() for h in hashtags) or "opening monologue" in text 
+        host_likely = bool(t.tags & HOST) or any("host" in h.lower() for h in t.hashtags) or "opening monologue" in text 
         if not host_likely:
             continue
         #get the time of the tweet
-        dt = to_datetime(t["timestamp"])
+        dt = t.timestamp
         current_min = dt.replace(second = 0, microsecond = 0)
         #build counter holding num relationary tweets in that specific time
         per_min[current_min] +=1
@@ -55,9 +46,8 @@ def find_window(tweets: Iterable[dict], window_minutes: int = 40):
     #now get the best window - most amount of host related tweets
     if not per_min:
         #in case per_min wasnt filled out, start at first timestamp if it exists
-        all_times =[to_datetime(t["timestamp"]) for t in tweets]
-        if all_times:
-            start = min(all_times)
+        if earliest is not None:
+            start = earliest
         else:
             start = datetime.now()
         return (start, start+timedelta(minutes=window_minutes))
@@ -135,27 +125,25 @@ def finalize_hosts(top_hosts: List[Tuple[str, int]]) -> List[str]:
 def find_hosts(cleaned_path: str, drop_retweets: bool=True, window_minutes: int=40) -> List[str]:
 
     #takes in tweets - returns host name
-    data = list(load_clean_tweets(cleaned_path))
-    start, end = find_window(data, window_minutes=window_minutes)
+    #shared corpus if it's loaded, otherwise the time shards - never parsed twice
+    start, end = find_window(stream(cleaned_path), window_minutes=window_minutes)
 
     scores = Counter()
-    for tweet in data:
-        if drop_retweets and tweet.get("is_retweet"):
+    #only the tweets in our window (time index or overlapping shards)
+    for tweet in window(cleaned_path, start, end):
+        if drop_retweets and tweet.is_retweet:
             continue #in case we dont want to count retweets
 
-        text = tweet.get("text", "")
+        text = tweet.text
         if not text:
             continue
-        dt = to_datetime(tweet["timestamp"])
-        if not (start <=dt <end):
-            continue #dont want tweets not in our window
         
-        hashtags = tweet.get("hashtags", []) or []
-        has_host = bool(host_verbs.search(text)) or any("host" in (h or "").lower() for h in hashtags)
+        has_host = bool(tweet.tags & HOST) or any("host" in (h or "").lower() for h in tweet.hashtags)
         if not has_host:
             continue #want tweets that are host related
 
-        base = 2 if ("opening monologue" in text.lower() or "please welcome" in text.lower()) else 1
+        text_l = tweet.text_lower
+        base = 2 if ("opening monologue" in text_l or "please welcome" in text_l) else 1
 
         for name in get_name_candidates(text):
             scores[name] += base
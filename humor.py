@@ -1,25 +1,14 @@
-import re, nltk
+import re
 from collections import Counter
 from datetime import timedelta, datetime
 from typing import List, Dict, Tuple
 
-from hosts import load_clean_tweets, to_datetime, find_window, get_name_candidates
-from nltk.sentiment import SentimentIntensityAnalyzer
+from corpus import stream, window
+from hosts import find_window, get_name_candidates
+from nlp_pipeline.resources import vader
+from tags import HUMOR
 
-def get_vader():
-    try:
-        # Check for the resource
-        nltk.data.find("sentiment/vader_lexicon")
-    except LookupError:
-        nltk.download("vader_lexicon")
-
-get_vader()
-sia = SentimentIntensityAnalyzer()
-
-humor_verbs =  re.compile(
-    r"\b(lol|lmao|lmfao|rofl|haha+|hehe+|funny|hilarious|joke|jokes|joked|joking|roast|burn|zinger)\b",
-    re.I
-)
+#humor_verbs lives in tags.py, tweets come tagged HUMOR
 
 patterns = [
     re.compile(r"\bjoked about\s+([a-z0-9 \-']{3,80})", re.I),
@@ -53,7 +42,8 @@ def likely_a_person(name:str) -> bool:
 def sentiment_score(text_l: str) ->int:
     #figures out score
     
-    score = sia.polarity_scores(text_l)["compound"]
+    #shared analyzer, loaded the first time anything scores sentiment
+    score = vader().polarity_scores(text_l)["compound"]
     if score >=0.25:
         return 1
     elif score <= -0.4:
@@ -83,32 +73,24 @@ def find_themes(text: str) -> List[str]:
     return themes
 
 def humor_window(cleaned_path: str, mins_after_start: int = 75) -> Tuple[datetime, datetime]:
-    data = list(load_clean_tweets(cleaned_path))
-    start, _ = find_window(data, window_minutes=40)
+    start, _ = find_window(stream(cleaned_path), window_minutes=40)
     return start, start + timedelta(minutes=mins_after_start)
 
 def find_jokes(cleaned_path: str, top_k_people: int = 5, top_k_themes: int = 5) -> Dict[str, List[str]]:
     start, end = humor_window(cleaned_path)
-    seen = set()
     people = Counter()
     themes = Counter()
 
-    for tweet in load_clean_tweets(cleaned_path):
-        text = (tweet.get("text", "") or "")
-        if not text or text in seen:
-            continue
-        seen.add(text)
-
-        ts = tweet.get("timestamp")
-        if not ts:
-            continue
-        dt = to_datetime(ts)
-        if not (start <= dt < end):
+    # only the slice of the corpus inside the window;
+    # each distinct text counts once, judged by its first occurrence
+    for tweet in window(cleaned_path, start, end, dedup=True):
+        text = tweet.text
+        if not text:
             continue
 
-        text_l = text.lower()
-        if not humor_verbs.search(text_l):
+        if not tweet.tags & HUMOR:
             continue
+        text_l = tweet.text_lower
 
         score = sentiment_score(text_l)
         if score == 0:
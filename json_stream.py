@@ -0,0 +1,98 @@
+import io
+import json
+import zipfile
+from typing import Iterator, TextIO
+
+# incremental reader for big json array dumps (gg2013.json and friends)
+# json.load would pull the whole array into memory before we see the first tweet,
+# here we decode one element at a time out of a small rolling buffer
+
+_decoder = json.JSONDecoder()
+_ws = " \t\n\r"
+_delims = _ws + ",]"
+
+
+def iter_json_array(fh: TextIO, chunk_size: int = 1 << 16) -> Iterator[object]:
+    """Yield the elements of a top-level json array one at a time."""
+    buf = fh.read(chunk_size)
+    pos = 0
+    eof = not buf
+
+    def fill(buf, pos):
+        # drop what we already consumed and pull in the next chunk
+        more = fh.read(chunk_size)
+        return buf[pos:] + more, 0, not more
+
+    # find the opening bracket
+    while True:
+        while pos < len(buf) and buf[pos] in _ws:
+            pos += 1
+        if pos < len(buf) or eof:
+            break
+        buf, pos, eof = fill(buf, pos)
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("expected a json array")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        # skip whitespace and separators between elements
+        while True:
+            while pos < len(buf) and buf[pos] in _ws:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos, eof = fill(buf, pos)
+        if pos >= len(buf):
+            raise ValueError("unterminated json array")
+
+        ch = buf[pos]
+        if ch == "]":
+            if expect_value and not first:
+                raise ValueError("trailing comma in json array")
+            return
+        if ch == ",":
+            if expect_value:
+                raise ValueError("unexpected comma in json array")
+            expect_value = True
+            pos += 1
+            continue
+        if not expect_value:
+            raise ValueError(f"expected ',' or ']' at offset {pos}")
+
+        # decode one element, reading more input if it runs off the buffer
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buf, pos, eof = fill(buf, pos)
+                continue
+            # a bare number at the edge of the buffer might be cut short ("1.5e")
+            if not eof and (end == len(buf) or buf[end] not in _delims):
+                buf, pos, eof = fill(buf, pos)
+                continue
+            break
+
+        yield obj
+        pos = end
+        expect_value = False
+        first = False
+
+        # keep the buffer from growing without bound
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def iter_raw_tweets(path: str, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Stream tweet records from gg20xx.json or the first member of gg20xx.json.zip."""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            inner = zf.namelist()[0]
+            with zf.open(inner, "r") as fh:
+                yield from iter_json_array(io.TextIOWrapper(fh, encoding="utf-8"), chunk_size)
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            yield from iter_json_array(fh, chunk_size)
@@ -0,0 +1,136 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from langdetect import DetectorFactory, detect_langs
+
+# english filter for data_extract.py
+# langdetect is slow and random, so it only sees what the cheap tiers can't decide:
+#   1. heuristic: non-latin raw text -> no; stopword counts on the cleaned text -> yes/no
+#   2. cache: identical cleaned text (retweets) reuses the earlier answer
+#   3. langdetect in a process pool, seeded so reruns give the same answer
+
+EN_STOP = set("""
+the and is are was were to of in for on with this that it its you your i my me he she his her
+we our they their be been have has had at so but not what who just if all about can will do
+did how when why from an or out up no yes im its dont cant tonight
+""".split())
+
+FOREIGN_STOP = set("""
+el la los las del que y en por con para es una su lo le les des est et une du au pour pas qui
+der und ist nicht mit den che per non da um uma com nao mais ele ela muy pero como esta este
+""".split())
+
+SEED = 0
+
+
+def _seed_worker(seed: int) -> None:
+    DetectorFactory.seed = seed
+
+
+def detect_english(text: str, threshold: float = 0.5) -> bool:
+    # same rule data_extract.is_english always used
+    if not text or text.strip() == "":
+        return False
+    try:
+        langs = detect_langs(text)
+        if not langs:
+            return False
+        top = langs[0]
+        return top.lang == 'en' and top.prob >= threshold
+    except Exception:
+        return False
+
+
+def _detect_batch(texts: List[str], threshold: float) -> List[bool]:
+    return [detect_english(t, threshold) for t in texts]
+
+
+def heuristic(text: str, raw: Optional[str] = None) -> Optional[bool]:
+    """True/False when the answer is obvious, None when langdetect should decide."""
+    if not text or not text.strip():
+        return False
+    if raw:
+        letters = [c for c in raw if c.isalpha()]
+        if letters:
+            non_ascii = sum(1 for c in letters if not c.isascii())
+            if non_ascii / len(letters) > 0.3:
+                return False   # cjk, arabic, cyrillic, ... before unidecode flattened it
+    toks = text.split()
+    en = sum(1 for t in toks if t in EN_STOP)
+    fo = sum(1 for t in toks if t in FOREIGN_STOP)
+    if fo == 0 and en >= 2 and en >= 0.2 * len(toks):
+        return True
+    if fo >= 2 and fo > en:
+        return False
+    return None
+
+
+class LanguageFilter:
+    """Batched is-english classifier with per-tier counters."""
+
+    def __init__(self, workers: int = 1, threshold: float = 0.5, seed: int = SEED,
+                 cache_size: int = 1 << 18, batch_size: int = 256):
+        self.threshold = threshold
+        self.seed = seed
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache: Dict[str, bool] = {}
+        self.counts = {"heuristic": 0, "cache": 0, "langdetect": 0}
+        self.seconds = 0.0
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_seed_worker, initargs=(seed,))
+        else:
+            _seed_worker(seed)
+
+    def classify(self, texts: Sequence[str], raw_texts: Optional[Sequence[str]] = None) -> List[bool]:
+        t0 = time.perf_counter()
+        out: List[Optional[bool]] = [None] * len(texts)
+        todo: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            verdict = heuristic(text, raw_texts[i] if raw_texts is not None else None)
+            if verdict is not None:
+                out[i] = verdict
+                self.counts["heuristic"] += 1
+                continue
+            cached = self.cache.get(text)
+            if cached is not None:
+                out[i] = cached
+                self.counts["cache"] += 1
+                continue
+            if text in todo:
+                # same text twice in this batch, only detect it once
+                self.counts["cache"] += 1
+            todo.setdefault(text, []).append(i)
+
+        pending = list(todo)
+        self.counts["langdetect"] += len(pending)
+        if pending:
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            if self.pool is not None:
+                results = self.pool.map(_detect_batch, batches, [self.threshold] * len(batches))
+            else:
+                results = (_detect_batch(b, self.threshold) for b in batches)
+            for batch, verdicts in zip(batches, results):
+                for text, verdict in zip(batch, verdicts):
+                    if len(self.cache) < self.cache_size:
+                        self.cache[text] = verdict
+                    for i in todo[text]:
+                        out[i] = verdict
+
+        self.seconds += time.perf_counter() - t0
+        return out
+
+    def report(self) -> None:
+        total = sum(self.counts.values())
+        rate = total / self.seconds if self.seconds > 0 else 0.0
+        print(f"Language filter: {total} tweets in {self.seconds:.1f}s ({rate:,.0f} tweets/sec)")
+        for tier, n in self.counts.items():
+            share = 100.0 * n / total if total else 0.0
+            print(f"  decided by {tier}: {n} ({share:.1f}%)")
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,47 @@
+from bisect import bisect_left
+from typing import Iterable, List
+
+# "which names contain this one", for merging partial names into longer ones
+# the merges used to test every name against every other with `in`; the index keeps every
+# suffix of every name in one sorted list, so the names containing s are the owners of the
+# suffixes that start with s: one binary search plus a walk over the hits. containment is
+# plain substring containment, exactly what `s in name` says (lowercase the names first for
+# a case-insensitive index)
+
+
+class NameIndex:
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        suffixes = sorted((name[i:], k) for k, name in enumerate(self.names) for i in range(len(name)))
+        self._suffixes = [s for s, _ in suffixes]
+        self._owners = [k for _, k in suffixes]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def containing(self, s: str) -> List[int]:
+        """Positions of the names with `s in name`, ascending (a name contains itself)."""
+        if not s:
+            return list(range(len(self.names)))
+        found = set()
+        suffixes, owners = self._suffixes, self._owners
+        i = bisect_left(suffixes, s)
+        while i < len(suffixes) and suffixes[i].startswith(s):
+            found.add(owners[i])
+            i += 1
+        return sorted(found)
+
+    def contained_in_other(self, k: int) -> bool:
+        """True if another (different) name contains name k."""
+        name = self.names[k]
+        return any(self.names[j] != name for j in self.containing(name))
+
+    def related(self) -> List[List[int]]:
+        """For each name, the positions of the other names it contains or is contained in, ascending."""
+        out = [set() for _ in self.names]
+        for j, name in enumerate(self.names):
+            for i in self.containing(name):
+                if i != j:
+                    out[i].add(j)
+                    out[j].add(i)
+        return [sorted(r) for r in out]
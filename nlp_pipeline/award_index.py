@@ -0,0 +1,104 @@
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from rapidfuzz.distance import Indel
+from rapidfuzz.process import cdist
+
+# routing a tweet (or a "best ..." slice of it) to one of the award categories
+# the extractors score a phrase against every award with token overlap and difflib's ratio;
+# the index keeps the award side precomputed (normalized strings, token ids, a token -> awards
+# posting list, a difflib matcher per award) and scores a batch of phrases at once:
+#   overlap   |phrase tokens & award tokens| / |award tokens|, summed from the posting lists
+#   ratio     rapidfuzz's Indel similarity for every (phrase, award) pair in one cdist call.
+#             it's 2*LCS/len, difflib's ratio is 2*M/len with M the length of *a* common
+#             subsequence, so Indel is an upper bound and difflib only runs for awards that
+#             could still win. results are exactly the ones the full difflib loop gives
+
+# float slack for comparing bounds computed a different way than the exact scores
+EPS = 1e-9
+
+TOKEN_RE = re.compile(r"[a-z0-9\-]+")
+
+
+def normalize(s: str) -> str:
+    return re.sub(r"\s+", " ", s.strip().lower())
+
+
+def token_set(s: str) -> Set[str]:
+    return set(TOKEN_RE.findall(normalize(s)))
+
+
+class AwardIndex:
+    def __init__(self, award_names: Sequence[str]):
+        self.names = list(award_names)
+        self.normalized = [normalize(a) for a in self.names]
+        self.vocab = {}
+        self.postings: List[List[int]] = []
+        sizes = []
+        for j, a in enumerate(self.names):
+            toks = token_set(a)
+            sizes.append(len(toks))
+            for t in toks:
+                tid = self.vocab.setdefault(t, len(self.vocab))
+                if tid == len(self.postings):
+                    self.postings.append([])
+                self.postings[tid].append(j)
+        self.postings = [np.array(p, dtype=np.intp) for p in self.postings]
+        self.sizes = np.array(sizes, dtype=np.float64)
+        self._matchers = []
+        for a in self.normalized:
+            sm = SequenceMatcher(None)
+            sm.set_seq2(a)      # difflib caches its index of the second sequence
+            self._matchers.append(sm)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def overlap(self, tokens: Iterable[str]) -> np.ndarray:
+        """|tokens & award tokens| / |award tokens| for every award (0 where the award has none)."""
+        hits = np.zeros(len(self.names), dtype=np.int64)
+        for t in set(tokens):
+            tid = self.vocab.get(t)
+            if tid is not None:
+                hits[self.postings[tid]] += 1
+        out = np.zeros(len(self.names), dtype=np.float64)
+        np.divide(hits, self.sizes, out=out, where=self.sizes > 0)
+        return out
+
+    def ratio_bounds(self, phrases: Sequence[str]) -> np.ndarray:
+        """(len(phrases), awards) upper bounds on ratio(), from one cdist call."""
+        if not phrases:
+            return np.zeros((0, len(self.names)), dtype=np.float64)
+        return cdist([normalize(p) for p in phrases], self.normalized,
+                     scorer=Indel.normalized_similarity, dtype=np.float64)
+
+    def ratio(self, phrase: str, j: int) -> float:
+        """difflib's ratio of the normalized phrase and award j."""
+        sm = self._matchers[j]
+        sm.set_seq1(normalize(phrase))
+        return sm.ratio()
+
+    def best(self, phrase: str, bounds: np.ndarray, score, floor: float = -np.inf) -> Tuple[Optional[int], float]:
+        """First award with the highest score(j), given bounds[j] >= score(j) for every award.
+
+        Awards are tried from the highest bound down and the search stops once no bound can
+        reach the best score (or `floor`); returns (None, -inf) when nothing can reach floor.
+        """
+        best_j, best_sc = None, -np.inf
+        for j in np.argsort(-bounds, kind="stable").tolist():
+            bound = bounds[j] + EPS
+            if bound < best_sc or bound < floor:
+                break
+            sc = score(j)
+            if sc > best_sc or (sc == best_sc and j < best_j):
+                best_j, best_sc = j, sc
+        return best_j, best_sc
+
+
+@lru_cache(maxsize=8)
+def award_index(award_names: Tuple[str, ...]) -> AwardIndex:
+    """Shared index for a set of award names (built the first time it's asked for)."""
+    return AwardIndex(award_names)
@@ -0,0 +1,294 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from nlp_pipeline.resources import spacy_model_info, spacy_nlp
+
+# spaCy results shared by the extractors, kept across runs
+# what the extractors read back from a doc (entities, token text/pos) goes into SQLite next to the corpus:
+#   ner_cache.sqlite   docs(model, version, needs, hash, tokens, ents) + timing(model, version, needs, docs, seconds)
+# rows are keyed by the model package and version, what the doc was parsed for ("*" = full pipeline,
+# else e.g. "ents+pos") and a hash of the text. pre_ceremony() fills it for every distinct text the
+# nominee/winner/performance extractors will parse; anything else (presenter names, award fragments)
+# is parsed live and written back, so the next run finds it too. results are the same with or without
+# the cache, and a new model version just misses and gets rows of its own
+
+DEFAULT_PATH = "tweets_cleaned.jsonl"
+CACHE_NAME = "ner_cache.sqlite"
+COMMIT_EVERY = 500      # live parses written per transaction
+
+
+def doc_cache_path_for(jsonl_path: str) -> str:
+    # tweets_cleaned.jsonl -> ner_cache.sqlite in the same directory
+    return os.path.join(os.path.dirname(os.path.abspath(jsonl_path)), CACHE_NAME)
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def needs_key(needs: Optional[Iterable[str]]) -> str:
+    return "*" if needs is None else "+".join(sorted(set(needs)))
+
+
+def covers(stored: str, needs: Optional[Iterable[str]]) -> bool:
+    # a doc parsed for more than the caller reads is fine, for less it isn't
+    if stored == "*":
+        return True
+    return needs is not None and set(needs) <= set(stored.split("+"))
+
+
+class CachedToken(NamedTuple):
+    text: str
+    pos_: str
+    i: int
+
+    @property
+    def is_space(self) -> bool:
+        # same definition spaCy uses
+        return self.text.isspace()
+
+
+class CachedSpan(NamedTuple):
+    text: str
+    label_: str
+    start: int
+    end: int
+    start_char: int
+    end_char: int
+
+
+class CachedDoc:
+    """The parts of a spaCy Doc the extractors use: .text, .ents and the tokens."""
+
+    __slots__ = ("text", "tokens", "ents")
+
+    def __init__(self, text: str, tokens: Tuple[CachedToken, ...], ents: Tuple[CachedSpan, ...]):
+        self.text = text
+        self.tokens = tokens
+        self.ents = ents
+
+    def __iter__(self) -> Iterator[CachedToken]:
+        return iter(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, i):
+        return self.tokens[i]
+
+    @classmethod
+    def decode(cls, text: str, tokens: str, ents: str) -> "CachedDoc":
+        toks = tuple(CachedToken(text[a:a + n], pos, i) for i, (a, n, pos) in enumerate(json.loads(tokens)))
+        spans = tuple(CachedSpan(text[a:b], label, s, e, a, b) for a, b, label, s, e in json.loads(ents))
+        return cls(text, toks, spans)
+
+
+def encode(doc) -> Tuple[str, str]:
+    # char offsets instead of strings, the text itself is what we look up by
+    tokens = [[tok.idx, len(tok.text), tok.pos_] for tok in doc]
+    ents = [[ent.start_char, ent.end_char, ent.label_, ent.start, ent.end] for ent in doc.ents]
+    return json.dumps(tokens), json.dumps(ents)
+
+
+class DocCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS docs (model TEXT, version TEXT, needs TEXT, hash TEXT, tokens TEXT, ents TEXT, "
+            "PRIMARY KEY (model, version, hash, needs)) WITHOUT ROWID"
+        )
+        # total parse time per model/profile, to estimate what a hit saves
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS timing (model TEXT, version TEXT, needs TEXT, docs INTEGER, seconds REAL, "
+            "PRIMARY KEY (model, version, needs))"
+        )
+        self.db.commit()
+        self.model, self.version = spacy_model_info()
+        self.hits = 0
+        self.misses = 0
+        self.parse_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._pending = 0
+        self._per_doc: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM docs WHERE model = ? AND version = ?", (self.model, self.version)
+        ).fetchone()[0]
+
+    def lookup(self, text: str, needs: Optional[Iterable[str]] = None) -> Optional[CachedDoc]:
+        rows = self.db.execute(
+            "SELECT needs, tokens, ents FROM docs WHERE model = ? AND version = ? AND hash = ?",
+            (self.model, self.version, text_key(text)),
+        )
+        for stored, tokens, ents in rows:
+            if covers(stored, needs):
+                return CachedDoc.decode(text, tokens, ents)
+        return None
+
+    def seconds_per_doc(self, needs: Optional[Iterable[str]] = None) -> float:
+        nk = needs_key(needs)
+        if nk not in self._per_doc:
+            row = self.db.execute(
+                "SELECT docs, seconds FROM timing WHERE model = ? AND version = ? AND needs = ?",
+                (self.model, self.version, nk),
+            ).fetchone()
+            self._per_doc[nk] = row[1] / row[0] if row and row[0] else 0.0
+        return self._per_doc[nk]
+
+    def _hit(self, needs, n: int = 1) -> None:
+        self.hits += n
+        if n:
+            self.saved_seconds += n * self.seconds_per_doc(needs)
+
+    def store(self, needs: Optional[Iterable[str]], parsed: List[Tuple[str, object]], seconds: float) -> None:
+        """Write (text, doc) pairs parsed for `needs` in `seconds` total; committed every COMMIT_EVERY docs."""
+        if not parsed:
+            return
+        nk = needs_key(needs)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?, ?)",
+            [(self.model, self.version, nk, text_key(text)) + encode(doc) for text, doc in parsed],
+        )
+        self.db.execute(
+            "INSERT INTO timing VALUES (?, ?, ?, ?, ?) ON CONFLICT (model, version, needs) "
+            "DO UPDATE SET docs = docs + excluded.docs, seconds = seconds + excluded.seconds",
+            (self.model, self.version, nk, len(parsed), seconds),
+        )
+        self.parse_seconds += seconds
+        self._per_doc.pop(nk, None)
+        self._pending += len(parsed)
+        if self._pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self) -> None:
+        self.db.commit()
+        self._pending = 0
+
+    def get(self, text: str, needs: Optional[Iterable[str]] = None):
+        """Cached doc for text, or a live parse with the pipeline trimmed to `needs` (None = full)."""
+        doc = self.lookup(text, needs)
+        if doc is not None:
+            self._hit(needs)
+            return doc
+        self.misses += 1
+        nlp = spacy_nlp(needs)
+        t0 = time.perf_counter()
+        doc = nlp(text)
+        # written straight away, so asking again (this run or the next) is a hit
+        self.store(needs, [(text, doc)], time.perf_counter() - t0)
+        return doc
+
+    def pipe(self, texts: Iterable[str], needs: Optional[Iterable[str]] = None,
+             batch_size: int = 50, n_process: int = 1) -> Iterator:
+        """Like nlp.pipe(texts): docs in input order, only the uncached texts get parsed (each once)."""
+        texts = list(texts)
+        docs: List[object] = [self.lookup(t, needs) for t in texts]
+        todo: Dict[str, List[int]] = {}
+        for i, d in enumerate(docs):
+            if d is None:
+                todo.setdefault(texts[i], []).append(i)
+        misses = sum(len(idx) for idx in todo.values())
+        self._hit(needs, len(texts) - misses)
+        self.misses += misses
+        if todo:
+            nlp = spacy_nlp(needs)
+            t0 = time.perf_counter()
+            parsed = list(zip(todo, nlp.pipe(todo, batch_size=batch_size, n_process=n_process)))
+            self.store(needs, parsed, time.perf_counter() - t0)
+            self.commit()
+            for text, doc in parsed:
+                for i in todo[text]:
+                    docs[i] = doc
+        return iter(docs)
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (f"{self.hits} cached / {self.misses} parsed live ({rate:.1f}% hit rate), "
+                f"{self.parse_seconds:.1f}s in spaCy, ~{self.saved_seconds:.1f}s saved")
+
+
+def build_doc_cache(texts: Iterable[str], needs: Optional[Iterable[str]], path: str,
+                    batch_size: int = 256, n_process: int = 1) -> Tuple[int, int]:
+    """Parse whatever in texts isn't cached for this model and `needs` yet; returns (reused, parsed)."""
+    cache = get_doc_cache_at(path)
+    todo, seen, reused = [], set(), 0
+    for t in texts:
+        if not t or t in seen:
+            continue
+        seen.add(t)
+        if cache.lookup(t, needs) is not None:
+            reused += 1
+        else:
+            todo.append(t)
+    if todo:
+        # only load the model when there's something to parse
+        nlp = spacy_nlp(needs)
+        chunk = batch_size * 8
+        for start in range(0, len(todo), chunk):
+            part = todo[start:start + chunk]
+            t0 = time.perf_counter()
+            docs = list(nlp.pipe(part, batch_size=batch_size, n_process=n_process))
+            cache.store(needs, list(zip(part, docs)), time.perf_counter() - t0)
+            # an interrupted run keeps what it got through
+            cache.commit()
+    return reused, len(todo)
+
+
+def extractor_needs() -> List[str]:
+    """Everything the nominee, winner and performance extractors want from a doc."""
+    from nlp_pipeline import extract_nominees, extract_winners
+    import performance
+    return sorted(set(extract_nominees.SPACY_NEEDS) | set(extract_winners.SPACY_NEEDS) | set(performance.SPACY_NEEDS))
+
+
+def texts_for_extractors(corpus) -> List[str]:
+    """Every distinct text the nominee, winner and performance extractors will want parsed."""
+    from nlp_pipeline import extract_nominees, extract_winners
+    from tags import PERFORMANCE
+
+    # the first tweet of each group stands for the group: its tags come from the same text
+    want: Dict[str, None] = {}
+    for g in corpus.unique(extract_nominees.to_text):
+        if extract_nominees.wants_doc(g.tweet):
+            want[g.key] = None
+    for g in corpus.unique(extract_winners.to_text):
+        if extract_winners.wants_doc(g.tweet):
+            want[g.key] = None
+    for g in corpus.unique("text"):
+        if g.tweet.tags & PERFORMANCE:
+            want[g.key] = None
+    return list(want)
+
+
+# one connection per cache file, shared by every extractor in the run
+_CACHES: Dict[str, DocCache] = {}
+
+
+def get_doc_cache_at(path: str) -> DocCache:
+    key = os.path.abspath(path)
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = DocCache(key)
+    return cache
+
+
+def get_doc_cache(jsonl_path: str = DEFAULT_PATH) -> DocCache:
+    return get_doc_cache_at(doc_cache_path_for(jsonl_path))
+
+
+@atexit.register
+def _commit_all() -> None:
+    # live parses are committed in batches, don't lose the last one
+    for cache in _CACHES.values():
+        try:
+            cache.commit()
+        except sqlite3.Error:
+            pass
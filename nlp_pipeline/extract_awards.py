@@ -30,13 +30,27 @@ best performance by an actor in a television series - comedy or musical
 import re
 import json
 from collections import Counter
+from functools import lru_cache
+from typing import Dict, Tuple
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
-import nltk
-from nltk.corpus import wordnet as wn
-nltk.download('wordnet', quiet=True)
-import spacy
 from rapidfuzz import fuzz, process
+from corpus import get_corpus
+from nlp_pipeline.doc_cache import get_doc_cache
+from nlp_pipeline.lexicon import get_word_table
+from tags import Automaton
+
+# entities + pos tags to spot winner names and cut phrases; the parser and lemmatizer aren't used
+SPACY_NEEDS = ("ents", "pos")
+
+# the same matches, fragments ("motion picture", "drama", nominee names) and phrases come up
+# thousands of times, so each distinct one is analysed once; bounded so a huge corpus can't grow them forever
+PHRASE_CACHE_SIZE = 1 << 16
+
+# refine_awards merges the MERGE_CANDIDATES most frequent cleaned phrases (max_phrases overrides it)
+MERGE_CANDIDATES = 2000
+MERGE_LIMIT = 5         # matches per phrase, process.extract's default
 
 award_patterns = [
     r"(?:award for|wins|won|receive[s]?|receiving|presenting|presented with|accept[s]?|accepting)\s+(?:the\s+)?(best [^.,;:!?]+)",
@@ -51,12 +65,68 @@ award_patterns = [
     r"\b(best [^-]+(?:-[^-]+)?)(?:\s*-\s*[^-]+){1,}"
 ]
 
+# words each pattern can't match without (lowercase, same order as award_patterns);
+# every pattern also needs the literal "best "
+award_triggers = [
+    ("award for", "wins", "won", "receive", "receiving", "presenting", "presented with", "accept"),
+    ("nominated for", "nominee for", "up for", "contender for"),
+    ("goes to",),
+    ("won by", "awarded to", "received by"),
+    ("award", "trophy", "prize"),
+    ("for", "in"),
+    ("won", "wins", "winning"),
+    ("congrats", "congratulations", "props"),
+    ("award for",),
+    ("-",),
+]
+
+class AwardMatcher:
+    """award_patterns compiled once, and run on a tweet only if its trigger words are in it.
+
+    One automaton pass over the tweet finds which patterns can match at all; those run
+    in their usual order, so the matches (and their order) are the same as running every
+    pattern. Non-ascii text runs every pattern, where lowercasing and re.IGNORECASE may disagree.
+    """
+
+    def __init__(self, patterns, triggers):
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.best = 1 << len(self.patterns)
+        literals = {"best ": self.best}
+        for i, words in enumerate(triggers):
+            for w in words:
+                literals[w] = literals.get(w, 0) | (1 << i)
+        self.automaton = Automaton(literals)
+        self.everything = (1 << len(self.patterns)) - 1
+
+    def candidates(self, text) -> int:
+        """Bitmask of the patterns that can match text."""
+        if not text.isascii():
+            return self.everything
+        hits = self.automaton.scan(text.lower())
+        return hits & self.everything if hits & self.best else 0
+
+    def findall(self, text):
+        """Same as re.findall with every pattern in turn, concatenated."""
+        mask = self.candidates(text)
+        out = []
+        for i, pattern in enumerate(self.patterns):
+            if mask >> i & 1:
+                out.extend(pattern.findall(text))
+        return out
+
+award_matcher = AwardMatcher(award_patterns, award_triggers)
+
 def looks_like_winner_fragment(fragment):
     """Return True if fragment likely refers to a winner, not an award subcategory."""
     frag = fragment.strip()
     if not frag:
         return False
-    doc = nlp(frag)
+    return _winner_fragment(frag)
+
+@lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def _winner_fragment(frag):
+    # the same fragments come back every run, so they go through the persistent cache
+    doc = get_doc_cache().get(frag, SPACY_NEEDS)
 
     # Named entities that suggest a person or creative work
     if any(ent.label_ in {"PERSON", "WORK_OF_ART"} for ent in doc.ents):
@@ -82,19 +152,21 @@ def extract(tweets):
 
     for text in tqdm(award_tweets, desc="Extracting awards"):
         # text_lower = text.lower()
-        for pattern in award_patterns:
-            matches = re.findall(pattern, text, flags=re.IGNORECASE)
-            for m in matches:
-                if isinstance(m, tuple):
-                    m = [x for x in m if x][0]
-                phrase = clean_award_phrase(m)
-                if len(phrase.split()) >= 3 and phrase.startswith("best"):
-                    award_counter[phrase] += 1
+        # every pattern that can match, in order (see AwardMatcher)
+        for m in award_matcher.findall(text):
+            if isinstance(m, tuple):
+                m = [x for x in m if x][0]
+            phrase = clean_award_phrase(m)
+            if len(phrase.split()) >= 3 and phrase.startswith("best"):
+                award_counter[phrase] += 1
     return award_counter
 
 def clean_award_phrase(phrase):
     """Clean up extracted award phrases."""
-    phrase = phrase.lower().strip()
+    return _clean_award_phrase(phrase.lower().strip())
+
+@lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def _clean_award_phrase(phrase):
     phrase = re.split(r"\b(for|to|by|from|goes to|goes|at|is)\b", phrase)[0].strip()
     
     if "-" in phrase:
@@ -124,14 +196,13 @@ def clean_award_phrase(phrase):
 
 
 
-nlp = spacy.load("en_core_web_sm")
-nltk.download('wordnet', quiet=True)
-
 def remove_entities(phrase):
-    phrase = phrase.lower().strip()
-       
+    return _remove_entities(phrase.lower().strip())
+
+@lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def _remove_entities(phrase):
     # Normalize hyphens for NER, but keep original for output later
-    doc = nlp(phrase)
+    doc = get_doc_cache().get(phrase, SPACY_NEEDS)
 
     tokens = []
     for token in doc:
@@ -159,7 +230,8 @@ def remove_entities(phrase):
         # print(after_words)
         unknown_ratio = 0
         if after_words[1:]:
-            unknown = [w for w in after_words if not wn.synsets(w)]
+            words = get_word_table()
+            unknown = [w for w in after_words if not words.known(w)]
             # if unknown:
             #     print("Unknown", unknown)
             unknown_ratio = len(unknown) / len(after_words)
@@ -170,24 +242,52 @@ def remove_entities(phrase):
     
     return phrase
 
+def phrase_cache_stats() -> Dict[str, Tuple[int, int]]:
+    """(hits, misses) of the phrase-level caches for this process."""
+    caches = {"phrases": _clean_award_phrase, "fragments": _winner_fragment, "entities": _remove_entities}
+    return {name: (f.cache_info().hits, f.cache_info().misses) for name, f in caches.items()}
+
 def is_person_related(phrase):
     """Return True if the award likely relates to a person."""
     phrase = phrase[1:]
+    words = get_word_table()
     for word in phrase.split():
-        synsets = wn.synsets(word)
-        if any("person" in s.lexname() for s in synsets):
+        if words.is_person(word):
             return True
     return False
 
+def similarity_matrix(phrases, threshold):
+    """token_set_ratio of every pair of phrases, 0 where it's below threshold.
+
+    Passing the same list as queries and choices lets cdist score each pair once. float32 halves
+    the n x n matrix and changes nothing: scores are 100 * 2m / len, and for phrases under a
+    couple of thousand characters two different ones are further apart than float32 rounding.
+    """
+    return process.cdist(phrases, phrases, scorer=fuzz.token_set_ratio, score_cutoff=threshold,
+                         dtype=np.float32, workers=-1)
+
+def close_matches(row, threshold, limit=MERGE_LIMIT):
+    """Indices of the close matches in a similarity_matrix row, best first.
+
+    The same picks, in the same order, as the phrases of
+    process.extract(phrase, phrases, scorer=fuzz.token_set_ratio, limit=limit) scoring >= threshold
+    (ties go to the lower index).
+    """
+    idx = np.flatnonzero(row >= threshold)
+    return idx[np.lexsort((idx, -row[idx]))[:limit]].tolist()
+
 def merge_similar_awards(counter, threshold):
     merged = {}
     seen = set()
     
+    phrases = list(counter)
+    position = {phrase: i for i, phrase in enumerate(phrases)}
     categories = {phrase: "person" if is_person_related(phrase) else "nonperson"
                   for phrase in counter}
 
     items = sorted(counter.items(), key=lambda x: -x[1])
 
+    scores = similarity_matrix(phrases, threshold)
     for phrase, _ in items:
         # if "score" not in phrase:
         #     continue
@@ -198,8 +298,11 @@ def merge_similar_awards(counter, threshold):
         cat = categories[phrase]
 
         # find close matches
-        matches = process.extract(phrase, counter.keys(), scorer=fuzz.token_set_ratio)
-        group = [m for m, score, _ in matches if score >= threshold and categories[m] == cat]
+        matches = close_matches(scores[position[phrase]], threshold)
+        group = [phrases[m] for m in matches if categories[phrases[m]] == cat]
+        if not group:
+            # MERGE_LIMIT other phrases tied at 100 crowded this one out of its own matches
+            group = [phrase]
         # DEBUG: show all high-similarity matches
         # print(f"--- Matches for: {phrase} ---")
         # for m, score, _ in matches:
@@ -220,7 +323,7 @@ def merge_similar_awards(counter, threshold):
 
 
 
-def refine_awards(raw_counter):
+def refine_awards(raw_counter, max_phrases=MERGE_CANDIDATES):
     # 1. Clean and filter
     cleaned = Counter()
     filtered = Counter({k: v for k, v in raw_counter.items() if v > 10})
@@ -234,7 +337,7 @@ def refine_awards(raw_counter):
             continue
         cleaned[phrase] = count
 
-    filtered = Counter(dict(Counter(cleaned).most_common(100)))
+    filtered = Counter(dict(Counter(cleaned).most_common(max_phrases)))
 
     merged = merge_similar_awards(filtered, threshold=85)
 
@@ -242,8 +345,8 @@ def refine_awards(raw_counter):
 
 
 def extract_awards(data_path):
-    data = pd.read_json(data_path, lines=True)
-    tweets = data["text"]
+    # only the text column is needed; mapped from the columnar store when pre_ceremony wrote one
+    tweets = pd.Series(get_corpus(data_path).texts(), dtype=object)
     # print(len(tweets))
 
     results = extract(tweets)
@@ -253,6 +356,10 @@ def extract_awards(data_path):
     award_candidates = results
 
     refined = refine_awards(award_candidates)
+    # keep whatever WordNet had to be asked for, the next run reads it from the table
+    get_word_table().save()
+    print("Award phrase caches: " + ", ".join(f"{name} {h} hits / {m} misses"
+                                               for name, (h, m) in phrase_cache_stats().items()))
     # print("----- Award Results ------")
     # for k, v in sorted(refined.items(), key=lambda x: -x[1])[:30]:
     #     print(f"{k}: {v}")
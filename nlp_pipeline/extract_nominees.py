@@ -5,9 +5,10 @@ import re
 from collections import Counter
 from typing import List, Dict
 
-import spacy
-
-from difflib import SequenceMatcher
+from corpus import Tweet, tags_of
+from nlp_pipeline.award_index import award_index
+from nlp_pipeline.doc_cache import get_doc_cache
+from tags import NOMINEE_DROP, NOMINEE_HINT, select
 
 # quick filters to keep garbage out of candidates (keep lowercase)
 STOP_SPAN = {
@@ -20,16 +21,25 @@ BAD_CAND_SUBSTR = (
     "@", "http://", "https://", "www.", "pic.twitter", "#"
 )
 
-# load spacy model once
-_NLP = spacy.load("en_core_web_sm")
+# verb hints and drop words live in tags.py (NOMINEE_HINTS / NOMINEE_DROP_IF);
+# corpus tweets come tagged NOMINEE_HINT / NOMINEE_DROP
+
+# only entities and token text are read, so spacy skips the tagger/parser/lemmatizer
+SPACY_NEEDS = ("ents",)
 
 def to_text(row) -> str:
     if isinstance(row, str):
         return row
+    if isinstance(row, Tweet):
+        return row.text or row.text_original
     if isinstance(row, dict):
         return row.get("text") or row.get("text_original") or ""
     return ""
 
+def wants_doc(row) -> bool:
+    # the cheap gates before a tweet gets parsed (pre_ceremony caches docs for these)
+    return select(tags_of(row), NOMINEE_HINT, NOMINEE_DROP)
+
 def normalize(s: str) -> str:
     return re.sub(r"\s+", " ", s.strip().lower())
 
@@ -167,56 +177,78 @@ def clean_candidate(name: str, award_name: str) -> str | None:
             return None
         return cleaned
 
+def route_phrases(phrases: List[str], award_names: List[str]) -> Dict[str, str | None]:
+    """phrase -> the award with the best 0.7 * token_overlap + 0.3 * difflib ratio, None below 0.35.
+
+    Same pick (first best on ties) as scoring every award; the AwardIndex bounds let most
+    awards skip difflib.
+    """
+    index = award_index(tuple(award_names))
+    distinct = list(dict.fromkeys(phrases))
+    bounds = index.ratio_bounds(distinct)
+    routes: Dict[str, str | None] = {}
+    for k, phrase in enumerate(distinct):
+        ov = index.overlap(token_set(phrase))
+        j, best_sc = index.best(
+            phrase, 0.7 * ov + 0.3 * bounds[k],
+            lambda j: 0.7 * ov[j] + 0.3 * index.ratio(phrase, j),
+            floor=0.35,
+        )
+        routes[phrase] = award_names[j] if j is not None and best_sc >= 0.35 else None
+    return routes
+
 # define main
 def extract_nominees(
     tweets: List[str | dict],
     award_names: List[str],
     top_k: int = 4,
     debug: bool = False,
+    weights: List[int] | None = None,
+    batch_size: int = 256,
+    n_process: int = 1,
 ) -> Dict[str, List[str]]:
     """fast, no-internet nominees extractor. keeps it simple and quick.
 
     tweets: list of tweet strings or dicts with text/text_original
     award_names: list of canonical award names (lowercase, hyphens ok)
     top_k: return this many per award (default 4)
+    weights: optional multiplicity per tweet (e.g. from TweetCorpus.unique), so
+        deduplicated input gives the same counts as the full stream
+    batch_size / n_process: passed to nlp.pipe for the tweets that survive the gates;
+        results don't depend on them
     """
-    # verb hints
-    hints = (
-        "best ", " nominee", " nomin", "should win", "should have won", "wins", "won"
-    )
-    drop_if = ("dress", "red carpet", "monologue")
+    # spacy results from pre_ceremony; anything missing is parsed live
+    docs = get_doc_cache()
 
     # per award counters
     buckets: Dict[str, Counter] = {aw: Counter() for aw in award_names}
 
-    def ratio(a: str, b: str) -> float:
-        # difflib ratio on normalized strings
-        return SequenceMatcher(None, normalize(a), normalize(b)).ratio()
-
-    for row in tweets:
+    # 1. gate: keep the tweets worth parsing and the award each one maps to
+    gated = []
+    for i, row in enumerate(tweets):
         text = to_text(row)
         if not text:
             continue
-        low = text.lower()
+        w = weights[i] if weights is not None else 1
 
-        # fast relevance gate
-        if not any(h in low for h in hints):
-            continue
-        if any(bad in low for bad in drop_if):
+        # fast relevance gate, from the tweet's tags
+        if not wants_doc(row):
             continue
+        low = text.lower()
 
         phrase = slice_best_phrase(low, max_tokens=8) or low
-        # combine token overlap with a light difflib ratio
-        scores = []
-        for a in award_names:
-            sc = 0.7 * token_overlap(phrase, a) + 0.3 * ratio(phrase, a)
-            scores.append((sc, a))
-        best_sc, best_aw = max(scores, key=lambda x: x[0])
-        if best_sc < 0.35:
-            continue
+        gated.append((text, phrase, w))
+
+    # combine token overlap with a light difflib ratio, each distinct phrase once
+    routes = route_phrases([p for _, p, _ in gated], award_names)
+    survivors = [(text, routes[phrase], w) for text, phrase, w in gated if routes[phrase] is not None]
+
+    # 2. parse the survivors in batches (docs cached by pre_ceremony are reused)
+    parsed = docs.pipe([text for text, _, _ in survivors], SPACY_NEEDS,
+                       batch_size=batch_size, n_process=n_process)
 
-        # clean and count
-        doc = _NLP(text)
+    # 3. clean and count, in the same order as the tweets came in
+    for (text, best_aw, w), doc in zip(survivors, parsed):
         seen_this_tweet = set()
         for cand in extract_candidates(doc, best_aw):
             cleaned = clean_candidate(cand, best_aw)
@@ -226,9 +258,9 @@ def extract_nominees(
             if key in seen_this_tweet:
                 continue
             seen_this_tweet.add(key)
-            buckets[best_aw][cleaned] += 1
+            buckets[best_aw][cleaned] += w
             if debug:
-                print(f"[{best_aw}] +1 :: {cleaned}")
+                print(f"[{best_aw}] +{w} :: {cleaned}")
 
     results: Dict[str, List[str]] = {}
     for aw in award_names:
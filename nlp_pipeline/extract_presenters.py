@@ -1,29 +1,25 @@
-import spacy
 import re
 from collections import defaultdict
-import ftfy
-from unidecode import unidecode
-from langdetect import detect
-import inflection
-import nltk
-from nltk import word_tokenize, pos_tag
 from difflib import get_close_matches
-from imdb import Cinemagoer
 from functools import lru_cache
 from tqdm import tqdm
 import json
+import numpy as np
 from rapidfuzz import fuzz, process
-import pandas as pd
-ia = Cinemagoer()
+from corpus import get_corpus
+from name_index import NameIndex
+from nlp_pipeline.doc_cache import get_doc_cache
+from nlp_pipeline.gazetteer import person_lookup
+from tags import PRESENTER
+
+# name fragments are checked for PERSON entities and PROPN/NOUN tokens; no parser or lemmatizer
+SPACY_NEEDS = ("ents", "pos")
 
 
 @lru_cache(maxsize=10000)
-def is_real_person(name):
-    try:
-        results = ia.search_person(name)
-        return bool(results)
-    except:
-        return False
+def is_real_person(name, people=None):
+    # people: the same lookup find_best_imdb_match gets (local name gazetteer if there is one, else IMDb)
+    return bool((people or person_lookup()).search_person(name))
 
 def normalize_terms(text):
     synonyms = {
@@ -34,54 +30,76 @@ def normalize_terms(text):
     normalized = set(synonyms.get(w, w) for w in words)
     return normalized
 
-def best_award_match(extracted_phrase, official_awards):
-    if not extracted_phrase:
-        return None
+AWARD_STOP_WORDS = {"award", "awards", "goes", "won", "to"}
+# terms are compared after normalize_terms, which lowercases (so "TV" itself never counts, "tv" does as "television")
+IMPORTANT_TERMS = ("actor", "actress", "supporting", "song", "score", "television", "TV", "screenplay", "series")
+AWARD_MATCH_MIN = 70
 
-    STOP_WORDS = {"award", "awards", "goes", "won", "to"}
-    important_terms = {"actor", "actress", "supporting", "song", "score", "television", "TV", "screenplay", "series"}
+def clean_award_raw(extracted_phrase):
+    # cut the phrase at the first stop word ("... award goes to", "... won")
     words = extracted_phrase.split()
     for i, w in enumerate(words):
-        if w.lower() in STOP_WORDS:
+        if w.lower() in AWARD_STOP_WORDS:
             extracted_phrase = " ".join(words[:i])
             break
-    remove = r"\b(?:{})\b.*".format("|".join(map(re.escape, STOP_WORDS)))
-    extracted_phrase = re.sub(remove, "", extracted_phrase).strip()
+    remove = r"\b(?:{})\b.*".format("|".join(map(re.escape, AWARD_STOP_WORDS)))
+    return re.sub(remove, "", extracted_phrase).strip()
+
+def important_terms_matrix(texts):
+    # one row per text, a 1 for each important term it has (after normalize_terms)
+    out = np.zeros((len(texts), len(IMPORTANT_TERMS)), dtype=np.int64)
+    for i, text in enumerate(texts):
+        terms = normalize_terms(text)
+        for k, term in enumerate(IMPORTANT_TERMS):
+            if term in terms:
+                out[i, k] = 1
+    return out
+
+class PresenterAwardMatcher:
+    """Award phrase -> official award, for every distinct phrase once.
+
+    score = token_sort_ratio(phrase, award) + 10 per important term both have; the best award
+    (first one on ties) counts if it scores AWARD_MATCH_MIN or more. a batch of phrases is scored
+    against every award with one cdist call, the term boost is a matrix product on top.
+    """
+
+    def __init__(self, official_awards):
+        self.awards = list(official_awards)
+        self.lowered = [a.lower() for a in self.awards]
+        self.award_terms = important_terms_matrix(self.awards)
+        self._memo = {}
+
+    def match_all(self, raw_phrases):
+        """{raw phrase: award or None} for raw phrases the way the presenter regexes capture them."""
+        todo = [p for p in dict.fromkeys(raw_phrases) if p and p not in self._memo]
+        cleaned = [clean_award_raw(p) for p in todo]
+        if todo and self.awards:
+            scores = process.cdist(cleaned, self.lowered, scorer=fuzz.token_sort_ratio, dtype=np.float64)
+            scores += 10 * (important_terms_matrix(cleaned) @ self.award_terms.T)
+            best = scores.argmax(axis=1)
+            for i, p in enumerate(todo):
+                j = best[i]
+                self._memo[p] = self.awards[j] if scores[i, j] >= AWARD_MATCH_MIN else None
+        else:
+            self._memo.update(dict.fromkeys(todo))
+        return {p: self._memo.get(p) for p in raw_phrases}
+
+@lru_cache(maxsize=8)
+def award_matcher(official_awards):
+    return PresenterAwardMatcher(official_awards)
 
-    scores = []
-    for award in official_awards:
-        base_score = fuzz.token_sort_ratio(extracted_phrase, award.lower())
-        # --- semantic weighting (boost if key words match) ---
-        
-        extracted_terms = normalize_terms(extracted_phrase)
-        award_terms = normalize_terms(award)
-        overlap = important_terms.intersection(extracted_terms & award_terms)
-        if overlap:
-            base_score += 10 * len(overlap)  # boost for each important word match
-
-        scores.append((award, base_score))
-
-    best_match, best_score = max(scores, key=lambda x: x[1])
-
-    if best_score >= 70:  # adjust threshold
-        return best_match
-    else:
-        # if best_score >= 65:
-            # print(f"No good match for: {extracted_phrase} (best {best_score}) match to {best_match}")
+def best_award_match(extracted_phrase, official_awards):
+    if not extracted_phrase:
         return None
+    return award_matcher(tuple(official_awards)).match_all([extracted_phrase])[extracted_phrase]
 
-def find_best_imdb_match(name, top_n=3):
+def find_best_imdb_match(name, top_n=3, people=None):
     """Find the most similar IMDb person name for a given name."""
-    try:
-        results = ia.search_person(name)
-    except Exception as e:
-        # print(f"IMDb error for {name}: {e}")
-        return None
-    
-    if not results:
+    # people: where names are looked up (gazetteer.person_lookup(), offline when there's a name.basics dump)
+    candidate_names = (people or person_lookup()).search_person(name)
+    if not candidate_names:
         return None
 
-    candidate_names = [p['name'] for p in results]
     best_match = process.extractOne(name, candidate_names, scorer=fuzz.WRatio)
     if best_match and best_match[1] > 85:  # confidence threshold
         return best_match[0]
@@ -90,17 +108,16 @@ def find_best_imdb_match(name, top_n=3):
 def merge_partial_names(merged):
     names = list(merged.keys())
     to_merge = {}
-    
-    for name1 in names:
-        for name2 in names:
-            if name1 == name2:
-                continue
-            # If one name is contained within another (case-insensitive)
-            if name1.lower() in name2.lower() or name2.lower() in name1.lower():
-                # Merge to the longer name (assumed more complete)
-                longer = name1 if len(name1) > len(name2) else name2
-                shorter = name2 if longer == name1 else name1
-                to_merge[shorter] = longer
+    # If one name is contained within another (case-insensitive)
+    related = NameIndex([n.lower() for n in names]).related()
+
+    for a, name1 in enumerate(names):
+        for b in related[a]:
+            name2 = names[b]
+            # Merge to the longer name (assumed more complete)
+            longer = name1 if len(name1) > len(name2) else name2
+            shorter = name2 if longer == name1 else name1
+            to_merge[shorter] = longer
 
     # Apply merges
     for short, long in to_merge.items():
@@ -110,16 +127,17 @@ def merge_partial_names(merged):
 
     return merged
 
-def merge_similar_names_by_award(results_dict):
+def merge_similar_names_by_award(results_dict, people=None):
     """Merge similar names per award, only keeping IMDb-verified ones."""
     merged_results = {}
+    people = people or person_lookup()
 
     for award, names in results_dict.items():
         merged = defaultdict(list)
         removed = []
 
         for name in names:
-            best_imdb_name = find_best_imdb_match(name)
+            best_imdb_name = find_best_imdb_match(name, people=people)
             
             if not best_imdb_name:
                 removed.append(name)
@@ -140,12 +158,12 @@ def merge_similar_names_by_award(results_dict):
 
     return merged_results
 
-nlp = spacy.load("en_core_web_sm")
-
 # def extract_presenters(tweets, award_names):
 def extract_presenters(data_path, HARD_AWARD_CATEGORIES):
-    data = pd.read_json(data_path, lines=True)
-    tweets = data["text"]
+    # presenters are collected into sets, so every distinct text only needs one look
+    groups = get_corpus(data_path).unique("text")
+    # the same name fragments come up over and over, parse each once
+    docs = get_doc_cache(data_path)
     
     presenters = defaultdict(set)
     for award in HARD_AWARD_CATEGORIES:
@@ -154,8 +172,8 @@ def extract_presenters(data_path, HARD_AWARD_CATEGORIES):
     # clean and normalize tweets
     
    
-    keywords = ["present", "announce", "read", "introduce", "give"]
-    filtered_tweets = [t for t in tweets if any(kw in t.lower() for kw in keywords)]
+    # keywords ("present", "announce", ...) are in tags.py, the corpus tags them once
+    filtered_tweets = [g.key for g in groups if g.tweet.tags & PRESENTER]
     
     print(f"Filtered down to {len(filtered_tweets)} presenter-related tweets")
     # output_file = 'presenter_related.json'
@@ -177,6 +195,8 @@ def extract_presenters(data_path, HARD_AWARD_CATEGORIES):
     
     presenter_STOPWORDS = {"As", "They", "Are", "While", "When"}
     
+    # (names, raw award phrase) per regex hit; the award phrases are matched in one batch below
+    hits = []
 
     for tweet in tqdm(filtered_tweets, desc="Extracting presenters"):
     # for tweet in filtered_tweets:
@@ -198,7 +218,7 @@ def extract_presenters(data_path, HARD_AWARD_CATEGORIES):
                         remove = r"\b(?:{})\b.*".format("|".join(map(re.escape, presenter_STOPWORDS)))
                         name = re.sub(remove, "", name).strip()
                     if len(name.split()) > 0 and len(name.split()) < 5:
-                        doc = nlp(name)
+                        doc = docs.get(name, SPACY_NEEDS)
                         if len(doc.ents) == 0:
                             if all(tok.pos_ in {"PROPN", "NOUN"} for tok in doc):
                                 clean_names.append(name)                      
@@ -208,20 +228,17 @@ def extract_presenters(data_path, HARD_AWARD_CATEGORIES):
                             # else:
                                 # print(f"{ent.text} Not name")
                                 
-                if clean_names:
-                    if award_raw:
-                        # award_raw = clean_award_phrase(award_raw)
-                        matched_award = best_award_match(award_raw, HARD_AWARD_CATEGORIES)
-                    else:
-                        matched_award = None
+                if clean_names and award_raw:
+                    # award_raw = clean_award_phrase(award_raw)
+                    hits.append((clean_names, award_raw))
 
-                    if matched_award:
-                        presenters[matched_award].update(clean_names)
+    matched = award_matcher(tuple(HARD_AWARD_CATEGORIES)).match_all([award_raw for _, award_raw in hits])
+    for clean_names, award_raw in hits:
+        matched_award = matched[award_raw]
+        if matched_award:
+            presenters[matched_award].update(clean_names)
 
-                    
-
-        
-    results = merge_similar_names_by_award(presenters)
+    results = merge_similar_names_by_award(presenters, person_lookup(data_path))
     # for award, names in results.items():
     #     print(f"{award}: {names}")
 
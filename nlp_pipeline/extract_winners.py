@@ -5,24 +5,39 @@ from collections import Counter
 from functools import lru_cache
 from typing import List, Dict, Union
 
-import spacy
+from corpus import Tweet, tags_of
+from nlp_pipeline.award_index import award_index
+from nlp_pipeline.doc_cache import get_doc_cache
+from tags import WINNER_TRIGGER
 
-# load spacy model once
-NLP = spacy.load("en_core_web_sm")
+Row = Union[str, dict, Tweet]
 
-Row = Union[str, dict]
+# only strong winner triggers: tags.WINNER_MUST_HAVE, corpus tweets come tagged WINNER_TRIGGER
+
+# only entities and token text are read, so spacy skips the tagger/parser/lemmatizer
+SPACY_NEEDS = ("ents",)
 
 def to_text(row: Row) -> str:
-    # handle raw strings or dicts from pre-ceremony step
+    # handle raw strings, dicts or corpus tweets from pre-ceremony step
     if isinstance(row, str):
         return row
+    if isinstance(row, Tweet):
+        return row.text_original or row.text
     if isinstance(row, dict):
         return row.get("text_original") or row.get("text") or ""
     return ""
 
+def dedup_key(row: Row) -> tuple:
+    # everything the tally depends on: identical keys always score identically
+    return (to_text(row), bool(isinstance(row, (dict, Tweet)) and row.get("is_retweet")))
+
+def wants_doc(row: Row) -> bool:
+    # cheap gate before a tweet gets parsed (pre_ceremony caches docs for these)
+    return bool(tags_of(row) & WINNER_TRIGGER)
+
 def is_retweet(row: Row, low: str) -> bool:
     # cheap rt detector; ok to be imperfect
-    if isinstance(row, dict) and row.get("is_retweet"):
+    if isinstance(row, (dict, Tweet)) and row.get("is_retweet"):
         return True
     return low.startswith("rt ") or low.startswith("rt @")
 
@@ -111,27 +126,46 @@ def fuzzy_ratio(a: str, b: str) -> float:
 
 def match_award_in_tweet(text_lower: str, award_names: list[str]) -> str | None:
     # pick 1 best-matching award to avoid contamination
+    return route_awards([text_lower], award_names)[text_lower]
+
+def route_awards(lows: List[str], award_names: List[str]) -> Dict[str, str | None]:
+    """match_award_in_tweet for a batch of lowercased tweets, each distinct text once.
+
+    token overlap first (>= 0.55), then the fuzzy ratio of the "best .." slice (>= 72),
+    then overlap again (>= 0.35); ties go to the first award, as in a loop over award_names.
+    the slices are scored against every award in one cdist call and difflib only runs
+    where that upper bound can still win.
+    """
+    index = award_index(tuple(award_names))
+    routes: Dict[str, str | None] = {}
     # token overlap
-    best, best_sc = None, 0.0
-    for aw in award_names:
-        sc = token_overlap(text_lower, aw)
-        if sc > best_sc:
-            best, best_sc = aw, sc
-    if best_sc >= 0.55:
-        return best
+    fallback: Dict[str, str | None] = {}
+    slices: Dict[str, str] = {}
+    for low in dict.fromkeys(lows):
+        ov = index.overlap(re.findall(r"[a-z0-9\-]+", normalize(low)))
+        j = int(ov.argmax()) if len(ov) else 0
+        best_sc = float(ov[j]) if len(ov) else 0.0
+        best = award_names[j] if best_sc > 0 else None
+        if best_sc >= 0.55:
+            routes[low] = best
+            continue
+        fallback[low] = best if best_sc >= 0.35 else None
+        sl = slice_best_phrase(low) or ""
+        if sl:
+            slices[low] = sl
 
     # fuzzy on the "best .. " slice
-    sl = slice_best_phrase(text_lower) or ""
-    if sl:
-        f_best, f_sc = None, -1.0
-        for aw in award_names:
-            sc = fuzzy_ratio(sl, aw)
-            if sc > f_sc:
-                f_best, f_sc = aw, sc
-        if f_best and f_sc >= 72:
-            return f_best
-
-    return best if best_sc >= 0.35 else None
+    distinct = list(dict.fromkeys(slices.values()))
+    bounds = 100.0 * index.ratio_bounds(distinct)
+    fuzzy: Dict[str, str | None] = {}
+    for k, sl in enumerate(distinct):
+        j, f_sc = index.best(sl, bounds[k], lambda j: 100.0 * index.ratio(sl, j), floor=72)
+        fuzzy[sl] = award_names[j] if j is not None and f_sc >= 72 else None
+
+    for low, best in fallback.items():
+        f_best = fuzzy.get(slices.get(low))
+        routes[low] = f_best if f_best else best
+    return routes
 
 def is_bad_candidate(name: str, award_name: str) -> bool:
     # reject generic phrases and tokens that are basically the award text itself
@@ -222,39 +256,48 @@ def extract_winners(
     tweets: List[Row],
     award_names: List[str],
     debug: bool = False,
+    weights: List[int] | None = None,
+    batch_size: int = 256,
+    n_process: int = 1,
 ) -> Dict[str, str]:
     """
     return a mapping award_name -> single winner string.
     - tweets may be raw strings or dicts with 'text'/'text_original'
     - award_names are the official categories (lowercase is fine)
+    - weights (optional) is the multiplicity of each tweet when duplicates were collapsed
+    - batch_size / n_process go to nlp.pipe for the gated tweets; results don't depend on them
     """
-    nlp = NLP
-
-    # only strong winner triggers
-    must_have = (" wins ", " won ", " goes to ", " award goes to ", " takes home ", " is awarded to ")
+    # spacy results from pre_ceremony; the shared model only loads for misses
+    docs = get_doc_cache()
 
     # counters per award
     tallies: Dict[str, Counter] = {aw: Counter() for aw in award_names}
 
-    for row in tweets:
+    # 1. gate: keep the tweets worth parsing and the award each one maps to
+    gated = []
+    for i, row in enumerate(tweets):
         text = to_text(row)
         if not text:
             continue
-        low = text.lower()
-
-        if not any(k in low for k in must_have):
+        if not wants_doc(row):
             continue  # skip general chatter
+        gated.append((i, row, text, text.lower()))
+
+    # skip a tweet if we can't confidently map it to a single award
+    routes = route_awards([g[3] for g in gated], award_names)
+    survivors = [(i, row, text, low, routes[low]) for i, row, text, low in gated if routes[low]]
 
-        matched_award = match_award_in_tweet(low, award_names)
-        if not matched_award:
-            continue  # skip if we can't confidently map this tweet to a single award
+    # 2. parse the survivors in batches (docs cached by pre_ceremony are reused)
+    parsed = docs.pipe([s[2] for s in survivors], SPACY_NEEDS, batch_size=batch_size, n_process=n_process)
 
-        # parse once
-        doc = nlp(text)
+    # 3. tally, in the same order as the tweets came in
+    for (i, row, text, low, matched_award), doc in zip(survivors, parsed):
         people = {ent.text.strip() for ent in doc.ents if ent.label_ == "PERSON"}
         titles = set(title_spans(doc))
 
         base_w = weight_from_text(low) * (0.5 if is_retweet(row, low) else 1.0)
+        if weights is not None:
+            base_w *= weights[i]
 
         # per-tweet de-dupe so a name only counts once per tweet
         seen = set()
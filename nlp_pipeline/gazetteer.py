@@ -0,0 +1,210 @@
+import gzip
+import os
+import re
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from unidecode import unidecode
+from rapidfuzz import fuzz, process
+
+from nlp_pipeline.resources import imdb
+
+# people names for the presenter stage, without going over the network
+# an IMDb name.basics dump (name.basics.tsv or .tsv.gz from datasets.imdbws.com, or any TSV with
+# a primaryName column) put next to the corpus is indexed once into name_gazetteer.sqlite:
+#   names(id, nconst, name, norm)   norm = ascii, lowercase, punctuation -> spaces
+#   postings(token, id)             every token of norm -> the names that have it
+#   vocab(token, n)                 how many names have the token
+# a search only scores the names that have all of the query's known tokens (or, if no name has
+# them all, its rarest one): that block is a few hundred names however big the dump is, and the
+# answer is the same every run. without a dump the lookups go to IMDb's own search (Cinemagoer)
+# as before; NETWORK_FALLBACK also sends the names the local index doesn't know there
+
+DEFAULT_PATH = "tweets_cleaned.jsonl"
+TSV_NAMES = ("name.basics.tsv", "name.basics.tsv.gz")
+INDEX_NAME = "name_gazetteer.sqlite"
+INDEX_VERSION = 1
+
+SEARCH_LIMIT = 20       # names a search returns, about one page of IMDb results
+BLOCK_LIMIT = 50000     # names scored per search at most
+NETWORK_FALLBACK = False
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    return _NON_ALNUM.sub(" ", unidecode(name).lower()).strip()
+
+
+def index_path_for(jsonl_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(jsonl_path)), INDEX_NAME)
+
+
+def tsv_path_for(jsonl_path: str) -> Optional[str]:
+    folder = os.path.dirname(os.path.abspath(jsonl_path))
+    for name in TSV_NAMES:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def tsv_stamp(tsv_path: str) -> str:
+    st = os.stat(tsv_path)
+    return f"{os.path.basename(tsv_path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def read_names(tsv_path: str) -> Iterator[Tuple[str, str]]:
+    """(nconst, primaryName) for every row of a name.basics-style TSV (\\N and blank names skipped)."""
+    opener = gzip.open if tsv_path.endswith(".gz") else open
+    with opener(tsv_path, "rt", encoding="utf-8") as f:
+        header = f.readline().rstrip("\n").split("\t")
+        col = header.index("primaryName")
+        key = header.index("nconst") if "nconst" in header else None
+        for line in f:
+            row = line.rstrip("\n").split("\t")
+            if len(row) <= col or row[col] in ("", "\\N"):
+                continue
+            yield (row[key] if key is not None else ""), row[col]
+
+
+class Gazetteer:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self._counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def meta(self, key: str) -> Optional[str]:
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    @classmethod
+    def build(cls, tsv_path: str, path: str, batch: int = 50000) -> "Gazetteer":
+        # into a temp file first, an interrupted build leaves the old index alone
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        db = sqlite3.connect(tmp)
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute("CREATE TABLE names (id INTEGER PRIMARY KEY, nconst TEXT, name TEXT, norm TEXT)")
+        db.execute("CREATE TABLE postings (token TEXT, id INTEGER, PRIMARY KEY (token, id)) WITHOUT ROWID")
+        rows, postings = [], []
+        for i, (nconst, name) in enumerate(read_names(tsv_path)):
+            norm = normalize_name(name)
+            rows.append((i, nconst, name, norm))
+            postings.extend((tok, i) for tok in set(norm.split()))
+            if len(rows) >= batch:
+                db.executemany("INSERT INTO names VALUES (?, ?, ?, ?)", rows)
+                db.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?)", postings)
+                rows, postings = [], []
+        db.executemany("INSERT INTO names VALUES (?, ?, ?, ?)", rows)
+        db.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?)", postings)
+        db.execute("CREATE TABLE vocab (token TEXT PRIMARY KEY, n INTEGER) WITHOUT ROWID")
+        db.execute("INSERT INTO vocab SELECT token, COUNT(*) FROM postings GROUP BY token")
+        db.executemany("INSERT INTO meta VALUES (?, ?)",
+                       [("version", str(INDEX_VERSION)), ("source", tsv_stamp(tsv_path))])
+        db.commit()
+        db.close()
+        os.replace(tmp, path)
+        return cls(path)
+
+    def token_count(self, token: str) -> int:
+        n = self._counts.get(token)
+        if n is None:
+            row = self.db.execute("SELECT n FROM vocab WHERE token = ?", (token,)).fetchone()
+            n = self._counts[token] = row[0] if row else 0
+        return n
+
+    def search_person(self, name: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        """Names like `name`, closest first (WRatio on the normalized forms)."""
+        norm = normalize_name(name)
+        known = [(self.token_count(t), t) for t in set(norm.split())]
+        known = [k for k in known if k[0]]
+        if not known:
+            return []
+        rows = []
+        if len(known) > 1:
+            rows = self._block([t for _, t in known])
+        if not rows:
+            rows = self._block([min(known)[1]])
+        choices = {i: norm_i for i, _, norm_i in rows}
+        display = {i: name_i for i, name_i, _ in rows}
+        out: List[str] = []
+        for _, _, i in process.extract(norm, choices, scorer=fuzz.WRatio, limit=None):
+            if display[i] not in out:
+                out.append(display[i])
+                if len(out) >= limit:
+                    break
+        return out
+
+    def _block(self, tokens: List[str]) -> List[Tuple[int, str, str]]:
+        # the names having every one of tokens
+        ids = " INTERSECT ".join(["SELECT id FROM postings WHERE token = ?"] * len(tokens))
+        return self.db.execute(
+            f"SELECT id, name, norm FROM names WHERE id IN ({ids}) ORDER BY id LIMIT ?", (*tokens, BLOCK_LIMIT),
+        ).fetchall()
+
+
+class ImdbSearch:
+    """IMDb's own person search, over the network (Cinemagoer)."""
+
+    def search_person(self, name: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        # IMDb decides how many results there are; limit is only there for the common interface
+        try:
+            results = imdb().search_person(name)
+        except Exception:
+            return []
+        return [p["name"] for p in results]
+
+
+class PersonLookup:
+    """search_person from the local gazetteer, asking IMDb for what it doesn't know if allowed."""
+
+    def __init__(self, local: Optional[Gazetteer], network: Optional[ImdbSearch]):
+        self.local = local
+        self.network = network
+        # the same names come up for several awards
+        self._memo: Dict[Tuple[str, int], List[str]] = {}
+
+    def search_person(self, name: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        found = self._memo.get((name, limit))
+        if found is None:
+            found = self.local.search_person(name, limit) if self.local is not None else []
+            if not found and self.network is not None:
+                found = self.network.search_person(name, limit)
+            self._memo[(name, limit)] = found
+        return list(found)
+
+
+def load_gazetteer(jsonl_path: str = DEFAULT_PATH) -> Optional[Gazetteer]:
+    """The index next to the corpus, (re)built from the TSV there when it's missing or out of date."""
+    path = index_path_for(jsonl_path)
+    tsv = tsv_path_for(jsonl_path)
+    if os.path.exists(path):
+        gaz = Gazetteer(path)
+        if gaz.meta("version") == str(INDEX_VERSION) and (tsv is None or gaz.meta("source") == tsv_stamp(tsv)):
+            return gaz
+        gaz.db.close()
+    if tsv is None:
+        return None
+    print(f"Indexing {tsv} into {path}")
+    return Gazetteer.build(tsv, path)
+
+
+_LOOKUPS: Dict[str, PersonLookup] = {}
+
+
+def person_lookup(jsonl_path: str = DEFAULT_PATH) -> PersonLookup:
+    key = index_path_for(jsonl_path)
+    lookup = _LOOKUPS.get(key)
+    if lookup is None:
+        local = load_gazetteer(jsonl_path)
+        network = ImdbSearch() if local is None or NETWORK_FALLBACK else None
+        lookup = _LOOKUPS[key] = PersonLookup(local, network)
+    return lookup
@@ -0,0 +1,99 @@
+import json
+import os
+from typing import Dict, Iterable
+
+from nlp_pipeline.resources import wordnet
+
+# the WordNet facts the award stage asks about, one small int per word:
+#   KNOWN   wn.synsets(word) isn't empty
+#   PERSON  one of those synsets has a person lexname (noun.person)
+# kept in wordnet_table.json next to the corpus. words the table hasn't seen are looked up in
+# WordNet and added, so the first run builds it and later runs never load the WordNet corpus
+# (a few hundred words of json instead of a multi-second corpus load)
+
+DEFAULT_PATH = "tweets_cleaned.jsonl"
+TABLE_NAME = "wordnet_table.json"
+TABLE_VERSION = 1
+
+KNOWN = 1
+PERSON = 2
+
+
+def table_path_for(jsonl_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(jsonl_path)), TABLE_NAME)
+
+
+def wordnet_stamp() -> str:
+    # the WordNet data ships with (and is read by) nltk; a different nltk means rebuild
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return "nltk-" + version("nltk")
+    except PackageNotFoundError:
+        return "nltk-unknown"
+
+
+def word_flags(word: str) -> int:
+    synsets = wordnet().synsets(word)
+    if not synsets:
+        return 0
+    return KNOWN | (PERSON if any("person" in s.lexname() for s in synsets) else 0)
+
+
+class WordTable:
+    def __init__(self, path: str, flags: Dict[str, int] = None):
+        self.path = path
+        self.flags: Dict[str, int] = flags if flags is not None else {}
+        self.added = 0
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def lookup(self, word: str) -> int:
+        f = self.flags.get(word)
+        if f is None:
+            f = self.flags[word] = word_flags(word)
+            self.added += 1
+        return f
+
+    def known(self, word: str) -> bool:
+        return bool(self.lookup(word) & KNOWN)
+
+    def is_person(self, word: str) -> bool:
+        return bool(self.lookup(word) & PERSON)
+
+    def add(self, words: Iterable[str]) -> None:
+        for w in words:
+            self.lookup(w)
+
+    def save(self) -> None:
+        # only when something new was looked up; write-then-rename so a crash can't leave half a table
+        if not self.added:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": TABLE_VERSION, "source": wordnet_stamp(), "flags": self.flags}, f,
+                      separators=(",", ":"), sort_keys=True)
+        os.replace(tmp, self.path)
+        self.added = 0
+
+    @classmethod
+    def load(cls, path: str) -> "WordTable":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != TABLE_VERSION or data.get("source") != wordnet_stamp():
+            return cls(path)
+        return cls(path, data.get("flags", {}))
+
+
+_TABLES: Dict[str, WordTable] = {}
+
+
+def get_word_table(jsonl_path: str = DEFAULT_PATH) -> WordTable:
+    path = table_path_for(jsonl_path)
+    table = _TABLES.get(path)
+    if table is None:
+        table = _TABLES[path] = WordTable.load(path)
+    return table
@@ -0,0 +1,149 @@
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# models and lexicons the pipeline needs, loaded the first time something asks for them
+# and shared by every module afterwards. importing this (or any stage) loads nothing,
+# so e.g. the autograder grading only hosts never pays for spaCy, WordNet or IMDb
+
+SPACY_MODEL = "en_core_web_sm"
+
+# what a stage can ask the spaCy pipeline for, and the Doc attributes that provide it
+# stages declare their needs (e.g. SPACY_NEEDS = ("ents",)) and get a pipeline that
+# only runs the components producing those; "pos" also keeps the attribute_ruler,
+# which is what maps tags to pos_ in the en_core_web_* models
+SPACY_ASSIGNS = {
+    "ents": {"doc.ents"},
+    "pos": {"token.pos", "token.tag"},
+}
+
+_LOADED: Dict[str, object] = {}
+_LOAD_SECONDS: Dict[str, float] = {}
+_PROFILES: Dict[Tuple[str, ...], "SpacyProfile"] = {}
+
+
+def _get(name: str, loader: Callable[[], object]):
+    obj = _LOADED.get(name)
+    if obj is None:
+        t0 = time.perf_counter()
+        obj = loader()
+        _LOAD_SECONDS[name] = time.perf_counter() - t0
+        _LOADED[name] = obj
+    return obj
+
+
+def _nltk_resource(path: str, package: str) -> None:
+    # only hit the network when the data really isn't there
+    import nltk
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        nltk.download(package, quiet=True)
+
+
+def _load_spacy():
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+def _load_vader():
+    _nltk_resource("sentiment/vader_lexicon.zip", "vader_lexicon")
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def _load_wordnet():
+    _nltk_resource("corpora/wordnet", "wordnet")
+    from nltk.corpus import wordnet
+    wordnet.ensure_loaded()
+    return wordnet
+
+
+def _load_imdb():
+    from imdb import Cinemagoer
+    return Cinemagoer()
+
+
+def components_for(nlp, needs: Iterable[str]) -> List[str]:
+    """Pipeline components (in order) needed to produce `needs`."""
+    needs = set(needs)
+    want = set().union(*(SPACY_ASSIGNS[n] for n in needs))
+    keep = set()
+    for name in nlp.pipe_names:
+        meta = nlp.get_pipe_meta(name)
+        if want & set(meta.assigns) or ("pos" in needs and meta.factory == "attribute_ruler"):
+            keep.add(name)
+    # plus any shared tok2vec/transformer a kept component listens to
+    for name in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe(name), "listening_components", None) or ()
+        if keep & set(listeners):
+            keep.add(name)
+    return [n for n in nlp.pipe_names if n in keep]
+
+
+class SpacyProfile:
+    """The shared pipeline, running only the components a stage needs."""
+
+    def __init__(self, nlp, needs: Tuple[str, ...]):
+        self.nlp = nlp
+        self.needs = needs
+        self.meta = nlp.meta
+        self.pipe_names = components_for(nlp, needs)
+        self.disable = [n for n in nlp.pipe_names if n not in self.pipe_names]
+
+    def __call__(self, text):
+        return self.nlp(text, disable=self.disable)
+
+    def pipe(self, texts, **kwargs):
+        return self.nlp.pipe(texts, disable=self.disable, **kwargs)
+
+
+def spacy_nlp(needs: Optional[Iterable[str]] = None):
+    """The shared en_core_web_sm pipeline; with needs, a view that skips everything else."""
+    nlp = _get("spacy", _load_spacy)
+    if needs is None:
+        return nlp
+    key = tuple(sorted(set(needs)))
+    profile = _PROFILES.get(key)
+    if profile is None:
+        profile = _PROFILES[key] = SpacyProfile(nlp, key)
+    return profile
+
+
+def spacy_model_info() -> Tuple[str, str]:
+    """(package name, version) of the spaCy model, read from its install metadata so nothing gets loaded."""
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return SPACY_MODEL, version(SPACY_MODEL)
+    except PackageNotFoundError:
+        # e.g. a model linked from a directory; ask the model itself
+        meta = spacy_nlp().meta
+        return f"{meta.get('lang')}_{meta.get('name')}", str(meta.get("version"))
+
+
+def vader():
+    """Shared VADER SentimentIntensityAnalyzer."""
+    return _get("vader", _load_vader)
+
+
+def wordnet():
+    """NLTK's WordNet reader, with the corpus downloaded if needed."""
+    return _get("wordnet", _load_wordnet)
+
+
+def imdb():
+    """Shared Cinemagoer client."""
+    return _get("imdb", _load_imdb)
+
+
+LOADERS = {"spacy": spacy_nlp, "vader": vader, "wordnet": wordnet, "imdb": imdb}
+
+
+def load_all() -> None:
+    # what importing the pipeline used to do; benchmarks.py uses it for comparison
+    for load in LOADERS.values():
+        load()
+
+
+def loaded() -> List[Tuple[str, float]]:
+    """(name, seconds it took) for every resource loaded so far."""
+    return [(name, _LOAD_SECONDS[name]) for name in _LOADED]
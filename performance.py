@@ -1,39 +1,43 @@
-import re
 import pandas as pd
-import spacy
 from tqdm import tqdm
+from corpus import get_corpus
+from name_index import NameIndex
+from nlp_pipeline.doc_cache import get_doc_cache
+# the keywords live in tags.py; every tweet is tagged PERFORMANCE once when the corpus loads
+from tags import PERFORMANCE
 
-def get_performance():
-    nlp = spacy.load("en_core_web_sm")
-    df = pd.read_json("tweets_cleaned.jsonl", lines=True)
-
-    performance_keywords = [
-        r"\bperformance\b", r"\bperform\b", r"\bsing\b", r"\bmonologue\b", r"\bspeech\b"
-    ]
+# only PERSON/ORG entities are read
+SPACY_NEEDS = ("ents",)
 
-    performance_pattern = re.compile("|".join(performance_keywords), re.IGNORECASE)
+def get_performance():
+    # docs parsed by pre_ceremony, the rest go through the shared model's nlp.pipe as before
+    docs = get_doc_cache("tweets_cleaned.jsonl")
+    # one row per distinct text; weight = how many tweets had it, so spacy runs once per text
+    groups = get_corpus("tweets_cleaned.jsonl").unique("text")
+    df = pd.DataFrame({"text": [g.key for g in groups], "weight": [g.count for g in groups]})
 
-    df["is_performance"] = df["text"].str.contains(performance_pattern)
+    df["is_performance"] = [bool(g.tweet.tags & PERFORMANCE) for g in groups]
     performance_tweets = df[df["is_performance"]]["text"].tolist()
-    print(f"Performance-related tweets: {len(performance_tweets)}")
+    performance_weights = df[df["is_performance"]]["weight"].tolist()
+    print(f"Performance-related tweets: {sum(performance_weights)} ({len(performance_tweets)} distinct)")
 
 
-    def extract_entities(tweets, keyword_regex, context_label):
+    def extract_entities(tweets, weights, context_label):
+        # tweets are already the PERFORMANCE-tagged ones
         results = []
-        for doc in nlp.pipe(tweets, batch_size=50):
+        for doc, weight in zip(docs.pipe(tweets, SPACY_NEEDS, batch_size=50), weights):
             text = doc.text
-            if not keyword_regex.search(text):
-                continue
             ents = [ent.text for ent in doc.ents if ent.label_ in ["PERSON", "ORG"]]
             if ents:
                 results.append({
                     "context": context_label,
                     "entities": ", ".join(sorted(set(ents))),
-                    "text": text
+                    "text": text,
+                    "weight": weight,
                 })
         return results
 
-    performance_records = extract_entities(performance_tweets, performance_pattern, "performance")
+    performance_records = extract_entities(performance_tweets, performance_weights, "performance")
     performance_df = pd.DataFrame(performance_records)
 
 
@@ -43,8 +47,8 @@ def get_performance():
         summary = (
             df.assign(entity=df["entities"].str.split(", "))
             .explode("entity")
-            .groupby("entity")
-            .size()
+            .groupby("entity")["weight"]
+            .sum()
             .reset_index(name="count")
             .sort_values("count", ascending=False)
         )
@@ -67,9 +71,10 @@ def get_performance():
     clean_entities = performance_summary["clean_entity"].drop_duplicates().tolist()
 
     # remove single-name entities that are contained in longer ones
+    index = NameIndex(clean_entities)
     filtered_entities = []
-    for ent in clean_entities:
-        if not any(ent != other and ent in other for other in clean_entities):
+    for k, ent in enumerate(clean_entities):
+        if not index.contained_in_other(k):
             filtered_entities.append(ent)
 
     cleaned_summary = (
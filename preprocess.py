@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ftfy import fix_text
+import unidecode as _unidecode
+
+# cleaning used by gg_api.pre_ceremony()
+# lives at module level so worker processes can import it
+
+# bump whenever clean_text / make_record change output, so old results get rebuilt
+CLEANER_VERSION = 1
+
+# regex + dash normalization to '-'
+url_re = re.compile(r"https?://\S+")
+rt_re = re.compile(r"\brt\b", re.IGNORECASE)
+mention_re = re.compile(r"@\w+")
+hashtag_re = re.compile(r"#\w+")
+punct_re = re.compile(r"[^A-Za-z0-9\s\-]")
+dash_map = dict.fromkeys(map(ord, "–—‐−‒"), ord("-"))
+
+# (text, timestamp_ms, id, screen_name, user_id) - only what we keep from a raw tweet
+Slim = Tuple[str, object, object, Optional[str], object]
+
+
+# plain ascii without these chars comes out of fix_text + unidecode unchanged
+# (& -> html entities, control chars -> dropped or normalized)
+_ascii_fixable = re.compile(r"[&\x00-\x08\x0b\x0d-\x1f\x7f]")
+
+CLEAN_CACHE_SIZE = 1 << 17
+_ascii_fast = 0
+
+
+def needs_text_fix(text: str) -> bool:
+    """False when ftfy/unidecode would be no-ops, so callers can skip them."""
+    return not text.isascii() or _ascii_fixable.search(text) is not None
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    # retweets and copy-pasted tweets repeat the exact same raw text a lot
+    return _clean_cached(text)
+
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _clean_cached(text: str) -> str:
+    global _ascii_fast
+    if needs_text_fix(text):
+        text = fix_text(text)
+        text = _unidecode.unidecode(text)
+        text = text.translate(dash_map)                 # keep hyphens
+    else:
+        _ascii_fast += 1
+    text = url_re.sub("", text)
+    text = rt_re.sub("", text)
+    text = mention_re.sub("", text)
+    text = hashtag_re.sub("", text)
+    # remove punctuation except -
+    text = punct_re.sub(" ", text)
+    text = " ".join(text.split())
+    return text
+
+
+def clean_cache_stats() -> Tuple[int, int, int]:
+    """(hits, misses, ascii fast path) for this process."""
+    info = _clean_cached.cache_info()
+    return info.hits, info.misses, _ascii_fast
+
+
+def slim(t: dict) -> Slim:
+    # raw tweets carry a lot of fields we never use, don't ship them to workers
+    user = t.get("user") or {}
+    return (t.get("text") or "", t.get("timestamp_ms"), t.get("id"), user.get("screen_name"), user.get("id"))
+
+
+def make_record(s: Slim) -> Tuple[dict, int]:
+    # returns the jsonl record plus the epoch-ms timestamp (-1 if missing) for the columnar store
+    raw_text, ts_ms, tweet_id, screen_name, user_id = s
+    cleaned = clean_text(raw_text)
+
+    try:
+        ms = int(ts_ms) if ts_ms else -1
+        ts_iso = datetime.fromtimestamp(ms / 1000.0).isoformat() if ts_ms else None
+    except Exception:
+        ms, ts_iso = -1, None
+
+    rec = {
+        "id": tweet_id,
+        "timestamp": ts_iso,
+        "screen_name": screen_name,
+        "user_id": user_id,
+        "text": cleaned,           # cleaned, hyphen-preserved text for extraction
+        "text_original": raw_text  # optional: for debugging
+    }
+    return rec, ms
+
+
+def record_line(rec: dict) -> str:
+    return json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def _clean_chunk(chunk: List[Slim]) -> Tuple[List[Tuple[dict, int]], int, List[float]]:
+    # worker side: clean one chunk and report who did it, how long it took and how the cache did
+    h0, m0, f0 = clean_cache_stats()
+    t0 = time.perf_counter()
+    recs = [make_record(s) for s in chunk]
+    secs = time.perf_counter() - t0
+    h1, m1, f1 = clean_cache_stats()
+    return recs, os.getpid(), [len(chunk), secs, h1 - h0, m1 - m0, f1 - f0]
+
+
+def _add_stats(stats: Dict[int, List[float]], pid: int, delta: List[float]) -> None:
+    entry = stats.setdefault(pid, [0, 0.0, 0, 0, 0])
+    for i, v in enumerate(delta):
+        entry[i] += v
+
+
+def _chunks(records: Iterable[dict], chunk_size: int) -> Iterator[List[Slim]]:
+    chunk = []
+    for t in records:
+        chunk.append(slim(t))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def clean_records(
+    records: Iterable[dict],
+    workers: int = 1,
+    chunk_size: int = 2000,
+    stats: Optional[Dict[int, List[float]]] = None,
+) -> Iterator[Tuple[dict, int]]:
+    """Yield (cleaned record, timestamp_ms) for raw tweet records, in input order.
+
+    workers > 1 fans chunks out to a process pool; output is identical to the serial path.
+    stats (if given) is filled with pid -> [tweets, seconds, cache hits, cache misses, ascii fast path].
+    """
+    if stats is None:
+        stats = {}
+
+    if workers <= 1:
+        for chunk in _chunks(records, chunk_size):
+            recs, pid, delta = _clean_chunk(chunk)
+            _add_stats(stats, pid, delta)
+            yield from recs
+        return
+
+    # keep a bounded number of chunks in flight so memory stays flat,
+    # and drain them in submission order so output order matches the input
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(pool.submit(_clean_chunk, chunk))
+            if len(pending) >= max_pending:
+                recs, pid, delta = pending.popleft().result()
+                _add_stats(stats, pid, delta)
+                yield from recs
+        while pending:
+            recs, pid, delta = pending.popleft().result()
+            _add_stats(stats, pid, delta)
+            yield from recs
+
+
+def report_worker_stats(stats: Dict[int, List[float]]) -> None:
+    hits = misses = fast = 0
+    for i, (pid, (n, secs, h, m, f)) in enumerate(sorted(stats.items())):
+        rate = n / secs if secs > 0 else 0.0
+        print(f"  cleaner {i} (pid {pid}): {int(n)} tweets, {rate:,.0f} tweets/sec")
+        hits, misses, fast = hits + h, misses + m, fast + f
+    lookups = hits + misses
+    if lookups:
+        print(f"  clean cache: {hits} hits / {misses} misses ({100.0 * hits / lookups:.1f}% hit rate), "
+              f"{fast} of {misses} misses took the ascii fast path")
+
+
+#************ Incremental runs ***************
+# pre_ceremony keeps a small manifest next to its outputs describing the input it cleaned.
+# unchanged input -> nothing to do; input with tweets appended -> clean just the new ones
+
+def manifest_path_for(out_path: str) -> str:
+    root, _ = os.path.splitext(out_path)
+    return root + ".manifest.json"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def input_state(in_path: str, digest: Optional[str] = None) -> dict:
+    st = os.stat(in_path)
+    return {
+        "input": in_path,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "digest": digest if digest is not None else file_digest(in_path),
+    }
+
+
+def plan_update(in_path: str, out_path: str, store_rows: Optional[int]) -> Tuple[str, Optional[dict]]:
+    """Decide how much work pre_ceremony has to do: "skip", "append" or "full"."""
+    manifest = load_manifest(manifest_path_for(out_path))
+    if not manifest or manifest.get("cleaner_version") != CLEANER_VERSION:
+        return "full", None
+    if manifest.get("input") != in_path:
+        return "full", None
+    # outputs have to be exactly what the manifest says we wrote
+    if not os.path.exists(out_path) or os.path.getsize(out_path) != manifest.get("output_size"):
+        return "full", None
+    if store_rows != manifest.get("records"):
+        return "full", None
+
+    st = os.stat(in_path)
+    if st.st_size == manifest["size"]:
+        if st.st_mtime_ns == manifest["mtime_ns"] or file_digest(in_path) == manifest["digest"]:
+            return "skip", manifest
+        return "full", None
+    if st.st_size > manifest["size"]:
+        # might be appended to; the prefix is checked record by record while streaming
+        return "append", manifest
+    return "full", None
+
+
+def _record_key(t: dict) -> bytes:
+    return repr(slim(t)).encode("utf-8")
+
+
+def skip_known_prefix(records: Iterator[dict], count: int, digest: str, h) -> bool:
+    """Consume the first `count` records, feeding them to h; True if they hash to `digest`."""
+    if count == 0:
+        return h.hexdigest() == digest
+    n = 0
+    for t in records:
+        h.update(_record_key(t))
+        n += 1
+        if n >= count:
+            break
+    return n == count and h.hexdigest() == digest
+
+
+def hashing(records: Iterable[dict], h) -> Iterator[dict]:
+    # keep the running record digest up to date as new records stream past
+    for t in records:
+        h.update(_record_key(t))
+        yield t
+
+
+def new_records_hasher():
+    return hashlib.blake2b(digest_size=20)
@@ -3,32 +3,17 @@ from collections import Counter
 from datetime import datetime, timedelta
 from typing import Iterable, List, Tuple, Dict
 
-from hosts import load_clean_tweets, to_datetime, find_window, get_name_candidates
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+from corpus import stream, window
+from hosts import find_window, get_name_candidates
+from nlp_pipeline.resources import vader
+from tags import OUTFIT, RED_CARPET
 
 from icrawler.builtin import BingImageCrawler
 
 
-def get_vader():
-    try:
-        # Check for the resource
-        nltk.data.find("sentiment/vader_lexicon")
-    except LookupError:
-        nltk.download("vader_lexicon")
-
-get_vader()
-sia = SentimentIntensityAnalyzer()
-
-
-red_carpet_verbs = re.compile(
-    r"\b(red carpet|#redcarpet|#eredcarpet|manicam|mani cam|arrivals?)\b",
-    re.IGNORECASE,
-)
-outfit_verbs = re.compile(
-    r"\b(dress|gown|tux|suit|outfit|look|train|sequin|sequins|lace|neckline|hem|fit|tailor|styled?)\b",
-    re.IGNORECASE,
-)
+
+
+#red_carpet_verbs / outfit_verbs live in tags.py, tweets come tagged RED_CARPET / OUTFIT
 not_a_person = {w.lower() for w in {
     "Golden","Globes","Globe","Red","Carpet","Awards","Award",
     "Best","Worst","Present","Presenter","Arrivals","Arrival",
@@ -53,7 +38,8 @@ def likely_a_person(name:str) -> bool:
 def sentiment_score(text: str) ->int:
     #figures out score
     
-    score = sia.polarity_scores(text)["compound"]
+    #shared analyzer, loaded the first time anything scores sentiment
+    score = vader().polarity_scores(text)["compound"]
     if score >=0.3:
         return 1
     elif score <= -0.3:
@@ -62,37 +48,29 @@ def sentiment_score(text: str) ->int:
 
 def ceremony_window(cleaned_path: str, minutes: int = 45) -> Tuple[datetime, datetime]:
     #use hosts.py to get best opening ceremony window
-    data = list(load_clean_tweets(cleaned_path))
-    start, end = find_window(data, window_minutes=minutes)
+    start, end = find_window(stream(cleaned_path), window_minutes=minutes)
     return start, end
 
 def redcarpet_window(cleaned_path: str, ceremony_start: datetime, max_prior_minutes: int =120) -> Tuple[datetime, datetime]:
     #the redcarpet will be before the host/opening ceremony
     #max_prior_minutes = the max time it could be before the hosting ceremony - lets say 2 hrs
-    data = list(load_clean_tweets(cleaned_path))
     per_min = Counter()
 
-    for tweet in data:
-        text = (tweet.get("text", "") or "")
+    #only want ones before ceremony not after, and no earlier than max_prior_minutes
+    earliest = ceremony_start - timedelta(minutes=max_prior_minutes)
+    for tweet in window(cleaned_path, earliest, ceremony_start):
+        text = tweet.text
         if not text:
             continue
-        timestamp = tweet.get("timestamp")
-        if not timestamp:
-            continue
-        
-        dt = to_datetime(timestamp)
-        if dt>=ceremony_start:
-            #only want ones before ceremony not after
-            continue
+        dt = tweet.timestamp
 
-        text_l = text.lower()
-        if red_carpet_verbs.search(text_l) or outfit_verbs.search(text_l):
+        if tweet.tags & (RED_CARPET | OUTFIT):
             minute = dt.replace(second=0, microsecond=0)
             per_min[minute] +=1
 
     if per_min:
         #holds the time and amount of relevant tweets at that minute
-        minutes = sorted(m for m in per_min if ceremony_start - timedelta(minutes=max_prior_minutes) <= m < ceremony_start)
+        minutes = sorted(m for m in per_min if earliest <= m < ceremony_start)
             #get the minutes between the earliest it could be and the latest (hosting)
         if minutes:
             best_total, best_start = -1, minutes[0]
@@ -152,24 +130,15 @@ def find_best_worst(cleaned_path: str, year: str, top_k: int = 5) -> Dict[str, L
 
     pos_scores = Counter()
     neg_scores = Counter()
-    tweets = load_clean_tweets(cleaned_path)
 
-    for tweet in tweets:
-        text = (tweet.get("text", "") or "")
+    for tweet in window(cleaned_path, rc_start, rc_end):
+        text = tweet.text
         if not text:
             continue
-        
-        timestamp = tweet.get("timestamp")
-        if not timestamp:
-            continue
-        
-        dt = to_datetime(timestamp)
-        if not (rc_start <= dt < rc_end):
-            continue
-        
-        text_l = text.lower()
-        if not (red_carpet_verbs.search(text_l) or outfit_verbs.search(text_l)):
+
+        if not tweet.tags & (RED_CARPET | OUTFIT):
             continue
+        text_l = tweet.text_lower
 
         label = 0
         if best_re.search(text_l):
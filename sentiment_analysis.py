@@ -1,12 +1,6 @@
 import json
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-
-# make sure the lexicon is available
-try:
-    nltk.data.find("sentiment/vader_lexicon.zip")
-except LookupError:
-    nltk.download("vader_lexicon")
+from corpus import get_corpus
+from nlp_pipeline.resources import vader
 
 # labels for overall verdict 
 LABELS = [
@@ -24,15 +18,11 @@ LABELS = [
 ]
 
 def analyze_sentiment(tweets_path="tweets_cleaned.jsonl", out_path="sentiment_summary.json"):
-    rows = []
-    with open(tweets_path, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                rows.append(json.loads(line))
-            except Exception:
-                pass
+    # only the text is scored, so just load that column
+    texts = get_corpus(tweets_path).texts()
 
-    sid = SentimentIntensityAnalyzer()
+    # shared analyzer (downloads the lexicon on first use if it's missing)
+    sid = vader()
 
     pos = neg = neu = 0
     very_pos = very_neg = 0
@@ -40,8 +30,8 @@ def analyze_sentiment(tweets_path="tweets_cleaned.jsonl", out_path="sentiment_su
     neg_sum = 0.0
     comp_sum = 0.0
 
-    for r in rows:
-        txt = (r.get("text") or "").strip()
+    for txt in texts:
+        txt = (txt or "").strip()
         if not txt:
             continue
         c = sid.polarity_scores(txt)["compound"]
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from tags import TAGS_VERSION
+
+# time-partitioned copy of tweets_cleaned.jsonl, written by pre_ceremony() when asked for
+# every partition covers `minutes` minutes of the ceremony and is its own jsonl file:
+#   tweets_cleaned.shards/catalog.json           partitions, their tweet counts, and the source size
+#   tweets_cleaned.shards/20130113T1900.jsonl    tweets with 19:00 <= timestamp < 19:00 + minutes
+#   tweets_cleaned.shards/untimed.jsonl          tweets without a timestamp
+# each line is the usual record plus "row" (its line in tweets_cleaned.jsonl) and
+# "first" (whether it's the first tweet with that cleaned text), so a window read from
+# a few shards can be put back in file order and deduplicated without the whole corpus;
+# "tags" is the tweet's topic bitmask (tags.py) so shard readers don't re-scan the text
+
+CATALOG_VERSION = 1
+UNTIMED = "untimed.jsonl"
+
+
+def shard_dir_for(jsonl_path: str) -> str:
+    # tweets_cleaned.jsonl -> tweets_cleaned.shards/
+    root, _ = os.path.splitext(jsonl_path)
+    return root + ".shards"
+
+
+def partition_start(dt: datetime, minutes: int) -> datetime:
+    return dt.replace(minute=dt.minute - dt.minute % minutes, second=0, microsecond=0)
+
+
+class Partition(NamedTuple):
+    start: Optional[datetime]   # None for the untimed partition
+    file: str
+    count: int
+
+
+def write_shards(corpus, jsonl_path: str, minutes: int = 5) -> int:
+    """Split the corpus into `minutes`-wide shard files plus a catalog; returns the partition count."""
+    if minutes < 1 or 60 % minutes:
+        raise ValueError(f"shard minutes must divide an hour, got {minutes}")
+    shard_dir = shard_dir_for(jsonl_path)
+    # start clean so partitions from an earlier layout don't linger
+    if os.path.isdir(shard_dir):
+        shutil.rmtree(shard_dir)
+    os.makedirs(shard_dir)
+
+    first = corpus.first_rows("text")
+    buckets: Dict[Optional[datetime], List[int]] = {}
+    for i, t in enumerate(corpus):
+        key = partition_start(t.timestamp, minutes) if t.timestamp is not None else None
+        buckets.setdefault(key, []).append(i)
+
+    parts = []
+    for key in sorted(buckets, key=lambda k: (k is None, k or datetime.min)):
+        name = key.strftime("%Y%m%dT%H%M") + ".jsonl" if key is not None else UNTIMED
+        with open(os.path.join(shard_dir, name), "w", encoding="utf-8") as f:
+            for i in buckets[key]:
+                t = corpus[i]
+                f.write(json.dumps({
+                    "row": i,
+                    "first": first[t.text] == i,
+                    "id": t.id,
+                    "timestamp": t.timestamp.isoformat() if t.timestamp is not None else None,
+                    "screen_name": t.screen_name,
+                    "user_id": t.user_id,
+                    "text": t.text,
+                    "text_original": t.text_original,
+                    "hashtags": list(t.hashtags),
+                    "is_retweet": t.is_retweet,
+                    "tags": t.tags,
+                }, ensure_ascii=False) + "\n")
+        parts.append({
+            "start": key.isoformat() if key is not None else None,
+            "file": name,
+            "count": len(buckets[key]),
+        })
+
+    # catalog last: a shard dir without one is treated as missing
+    with open(os.path.join(shard_dir, "catalog.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": CATALOG_VERSION,
+            "minutes": minutes,
+            "tags_version": TAGS_VERSION,
+            "rows": len(corpus),
+            "source_size": os.path.getsize(jsonl_path) if os.path.exists(jsonl_path) else None,
+            "partitions": parts,
+        }, f, indent=1)
+    return len(parts)
+
+
+class ShardCatalog:
+    def __init__(self, shard_dir: str, meta: dict):
+        self.shard_dir = shard_dir
+        self.meta = meta
+        self.minutes = int(meta["minutes"])
+        self.rows = int(meta["rows"])
+        self.partitions = [
+            Partition(datetime.fromisoformat(p["start"]) if p["start"] else None, p["file"], p["count"])
+            for p in meta["partitions"]
+        ]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Partition]:
+        """Timed partitions that can hold tweets with start <= timestamp < end."""
+        width = timedelta(minutes=self.minutes)
+        return [p for p in self.partitions
+                if p.start is not None and p.start < end and p.start + width > start]
+
+    def counts(self) -> Dict[Optional[datetime], int]:
+        return {p.start: p.count for p in self.partitions}
+
+    def read(self, part: Partition) -> Iterator[dict]:
+        with open(os.path.join(self.shard_dir, part.file), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_rows(self) -> Iterator[dict]:
+        # every tweet, one partition at a time (time order, not file order)
+        for p in self.partitions:
+            yield from self.read(p)
+
+
+def open_catalog(jsonl_path: str) -> Optional[ShardCatalog]:
+    """Return the shard catalog next to jsonl_path, or None if missing or stale."""
+    shard_dir = shard_dir_for(jsonl_path)
+    try:
+        with open(os.path.join(shard_dir, "catalog.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get("version") != CATALOG_VERSION or meta.get("tags_version") != TAGS_VERSION:
+        return None
+    size = meta.get("source_size")
+    if os.path.exists(jsonl_path) and size is not None and os.path.getsize(jsonl_path) != size:
+        return None
+    return ShardCatalog(shard_dir, meta)
@@ -0,0 +1,225 @@
+import hashlib
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# topic tags for every tweet, found in one pass
+# each stage used to run its own keyword gate (a substring loop or a regex) over every tweet;
+# the keywords all live here now, compiled into one Aho-Corasick automaton. a tweet is scanned
+# once (per text field) and gets a bitmask of the tags below, which the corpus keeps with the
+# tweet (and the columnar store / time shards on disk), so a stage picks its tweets with
+#   if tweet.tags & HOST: ...
+# a tag whose gate was a regex keeps the regex: the automaton only finds the tweets containing
+# one of its literals and the regex decides for those, so every tag means exactly what the old
+# gate did. literals are matched against the lowercased text
+
+# which text a tag looks at; nominees/winners read the cleaned or the original text first
+FIELDS: Dict[str, Callable[[str, str], str]] = {
+    "text": lambda text, original: text,
+    "nominee": lambda text, original: text or original,
+    "winner": lambda text, original: original or text,
+}
+
+
+class Tag(NamedTuple):
+    name: str
+    bit: int
+    field: str                      # a key of FIELDS
+    literals: Tuple[str, ...]       # lowercase; the tag is set if one of these occurs...
+    regex: Optional[re.Pattern]     # ...and, when given, this matches as well
+
+
+#************ keyword gates ***************
+
+# hosts.py
+host_verbs = re.compile(
+    r"\b(hosts?|hosting|hosted|your hosts|our hosts|please welcome|opening monologue)\b",
+    re.IGNORECASE,
+)
+
+# humor.py
+humor_verbs = re.compile(
+    r"\b(lol|lmao|lmfao|rofl|haha+|hehe+|funny|hilarious|joke|jokes|joked|joking|roast|burn|zinger)\b",
+    re.I
+)
+
+# red_carpet.py
+red_carpet_verbs = re.compile(
+    r"\b(red carpet|#redcarpet|#eredcarpet|manicam|mani cam|arrivals?)\b",
+    re.IGNORECASE,
+)
+outfit_verbs = re.compile(
+    r"\b(dress|gown|tux|suit|outfit|look|train|sequin|sequins|lace|neckline|hem|fit|tailor|styled?)\b",
+    re.IGNORECASE,
+)
+
+# performance.py
+performance_keywords = [
+    r"\bperformance\b", r"\bperform\b", r"\bsing\b", r"\bmonologue\b", r"\bspeech\b"
+]
+performance_pattern = re.compile("|".join(performance_keywords), re.IGNORECASE)
+
+# winners.py
+win_verbs = [
+    r"\bwin\b",
+    r"\bwon\b",
+    r"\bwins\b",
+    r"\bgoes to\b",
+    r"\baward goes to\b",
+    r"\btakes home\b"]
+win_re = re.compile("|".join(win_verbs), flags=re.IGNORECASE)
+negation_re = re.compile(
+    r"\b(should(?:\s+have)?\s+won|robbed|snubbed|did(?:n['’]t| not)\s+win|deserved to win)\b",
+    flags=re.IGNORECASE)
+future_re = re.compile(r"\b(will|should)\s+win\b", flags=re.IGNORECASE)
+
+# nlp_pipeline/extract_nominees.py
+NOMINEE_HINTS = ("best ", " nominee", " nomin", "should win", "should have won", "wins", "won")
+NOMINEE_DROP_IF = ("dress", "red carpet", "monologue")
+
+# nlp_pipeline/extract_winners.py: only strong winner triggers
+WINNER_MUST_HAVE = (" wins ", " won ", " goes to ", " award goes to ", " takes home ", " is awarded to ")
+
+# nlp_pipeline/extract_presenters.py
+PRESENTER_KEYWORDS = ("present", "announce", "read", "introduce", "give")
+
+TAGS: List[Tag] = [
+    Tag("host", 1 << 0, "text", ("host", "please welcome", "opening monologue"), host_verbs),
+    Tag("humor", 1 << 1, "text", ("lol", "lmao", "lmfao", "rofl", "haha", "hehe", "funny", "hilarious",
+                                  "jok", "roast", "burn", "zinger"), humor_verbs),
+    Tag("red_carpet", 1 << 2, "text", ("red carpet", "redcarpet", "manicam", "mani cam", "arrival"), red_carpet_verbs),
+    Tag("outfit", 1 << 3, "text", ("dress", "gown", "tux", "suit", "outfit", "look", "train", "sequin", "lace",
+                                   "neckline", "hem", "fit", "tailor", "style"), outfit_verbs),
+    Tag("performance", 1 << 4, "text", ("perform", "sing", "monologue", "speech"), performance_pattern),
+    Tag("presenter", 1 << 5, "text", PRESENTER_KEYWORDS, None),
+    Tag("nominee_hint", 1 << 6, "nominee", NOMINEE_HINTS, None),
+    Tag("nominee_drop", 1 << 7, "nominee", NOMINEE_DROP_IF, None),
+    Tag("winner_trigger", 1 << 8, "winner", WINNER_MUST_HAVE, None),
+    Tag("win_verb", 1 << 9, "text", ("win", "won", "goes to", "takes home"), win_re),
+    Tag("win_negated", 1 << 10, "text", ("should", "robbed", "snubbed", "did", "deserved to win"), negation_re),
+    Tag("win_future", 1 << 11, "text", ("will", "should"), future_re),
+]
+
+HOST, HUMOR, RED_CARPET, OUTFIT, PERFORMANCE, PRESENTER = (t.bit for t in TAGS[:6])
+NOMINEE_HINT, NOMINEE_DROP, WINNER_TRIGGER, WIN_VERB, WIN_NEGATED, WIN_FUTURE = (t.bit for t in TAGS[6:])
+
+# stored masks are only trusted if they were made from exactly these gates
+TAGS_VERSION = hashlib.blake2b(
+    repr([(t.name, t.bit, t.field, t.literals, t.regex.pattern if t.regex else None, t.regex.flags if t.regex else 0)
+          for t in TAGS]).encode("utf-8"),
+    digest_size=8,
+).hexdigest()
+
+
+def select(mask: int, want: int, reject: int = 0) -> bool:
+    """True if mask has any of the `want` tags and none of the `reject` ones."""
+    return bool(mask & want) and not mask & reject
+
+
+class Automaton:
+    """Aho-Corasick over a set of lowercase literals, each carrying a bitmask.
+
+    The goto/fail links are folded into one transition table per state (only for
+    characters that occur in some literal; any other character goes back to the root),
+    so scanning is a dict lookup per character.
+    """
+
+    def __init__(self, literals: Dict[str, int]):
+        goto: List[Dict[str, int]] = [{}]
+        out = [0]
+        for word, bits in literals.items():
+            s = 0
+            for ch in word:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = goto[s][ch] = len(goto)
+                    goto.append({})
+                    out.append(0)
+                s = nxt
+            out[s] |= bits
+
+        # breadth first: a state's fail link is always shallower, so it's finished first
+        alphabet = {ch for word in literals for ch in word}
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        fail = [0] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = list(goto[0].values())
+        for s in queue:
+            f = fail[s]
+            out[s] |= out[f]
+            row = {}
+            for ch in alphabet:
+                nxt = goto[s].get(ch)
+                if nxt is not None:
+                    fail[nxt] = delta[f].get(ch, 0)
+                    queue.append(nxt)
+                    row[ch] = nxt
+                else:
+                    t = delta[f].get(ch, 0)
+                    if t:
+                        row[ch] = t
+            delta[s] = row
+        self.delta = delta
+        self.out = out
+        self.states = len(goto)
+
+    def scan(self, text: str) -> int:
+        """OR of the bits of every literal occurring in text."""
+        delta, out = self.delta, self.out
+        s, bits = 0, 0
+        for ch in text:
+            s = delta[s].get(ch, 0)
+            bits |= out[s]
+        return bits
+
+
+class Tagger:
+    def __init__(self, tags: Iterable[Tag] = TAGS):
+        self.tags = list(tags)
+        self.fields = sorted({t.field for t in self.tags})
+        self.field_bits = {f: 0 for f in self.fields}
+        literals: Dict[str, int] = {}
+        for t in self.tags:
+            self.field_bits[t.field] |= t.bit
+            for lit in t.literals:
+                literals[lit] = literals.get(lit, 0) | t.bit
+        self.automaton = Automaton(literals)
+        self.by_field = {f: [(t.bit, t.regex) for t in self.tags if t.field == f and t.regex is not None]
+                         for f in self.fields}
+        # retweets and copies repeat the same texts a lot
+        self._memo: Dict[Tuple[str, str], int] = {}
+
+    def tag(self, text: str, original: str = "") -> int:
+        """Bitmask of TAGS for a tweet with this cleaned and original text."""
+        key = (text, original)
+        mask = self._memo.get(key)
+        if mask is not None:
+            return mask
+        mask = 0
+        scanned: Dict[str, int] = {}
+        for f in self.fields:
+            s = FIELDS[f](text, original)
+            hits = scanned.get(s)
+            if hits is None:
+                hits = scanned[s] = self.automaton.scan(s.lower())
+            hits &= self.field_bits[f]
+            for bit, regex in self.by_field[f]:
+                if hits & bit and not regex.search(s):
+                    hits &= ~bit
+            mask |= hits
+        if len(self._memo) < 1 << 18:
+            self._memo[key] = mask
+        return mask
+
+
+_TAGGER: Optional[Tagger] = None
+
+
+def tagger() -> Tagger:
+    global _TAGGER
+    if _TAGGER is None:
+        _TAGGER = Tagger()
+    return _TAGGER
+
+
+def tag_texts(text: str, original: str = "") -> int:
+    return tagger().tag(text or "", original or "")
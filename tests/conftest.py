@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the pipeline modules live at the repo root (no package), import them the way gg_api.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
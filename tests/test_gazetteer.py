@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+
+from nlp_pipeline import gazetteer, resources
+from nlp_pipeline.extract_presenters import find_best_imdb_match, merge_similar_names_by_award
+
+STUB_TSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "name.basics.tsv")
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    # every lookup here has to be answered by the local index
+    def offline():
+        raise AssertionError("tried to reach IMDb over the network")
+    monkeypatch.setattr(resources, "imdb", offline)
+    monkeypatch.setattr(gazetteer, "imdb", offline)
+    monkeypatch.setattr(gazetteer, "_LOOKUPS", {})
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    shutil.copy(STUB_TSV, tmp_path / "name.basics.tsv")
+    return str(tmp_path / "tweets_cleaned.jsonl")
+
+
+@pytest.fixture
+def gaz(data_path):
+    return gazetteer.Gazetteer.build(gazetteer.tsv_path_for(data_path), gazetteer.index_path_for(data_path))
+
+
+def test_build_skips_missing_names(gaz):
+    # the \N and blank primaryName rows aren't indexed
+    assert len(gaz) == 6
+    assert gaz.meta("version") == str(gazetteer.INDEX_VERSION)
+
+
+def test_search_exact(gaz):
+    assert gaz.search_person("Tina Fey")[0] == "Tina Fey"
+
+
+def test_search_accents(gaz):
+    assert gaz.search_person("Jose Ferrer") == ["José Ferrer"]
+
+
+def test_search_typo(gaz):
+    assert gaz.search_person("Amy Poeler")[0] == "Amy Poehler"
+
+
+def test_search_surname_only(gaz):
+    assert gaz.search_person("Fey") == ["Tina Fey"]
+
+
+def test_search_unknown(gaz):
+    assert gaz.search_person("Nobody Xyz") == []
+    assert gaz.search_person("") == []
+
+
+def test_load_reuses_index(data_path, gaz):
+    again = gazetteer.load_gazetteer(data_path)
+    assert again.meta("source") == gaz.meta("source")
+    assert len(again) == 6
+
+
+def test_person_lookup_stays_offline(data_path):
+    people = gazetteer.person_lookup(data_path)
+    assert people.network is None
+    assert people.search_person("Nobody Xyz") == []
+    assert find_best_imdb_match("Anne Hathaway", people=people) == "Anne Hathaway"
+
+
+def test_merge_similar_names_by_award(data_path):
+    people = gazetteer.person_lookup(data_path)
+    merged = merge_similar_names_by_award(
+        {"best director": ["Tina Fey", "Fey", "Amy Poeler", "Nobody Here"], "best actor": []},
+        people=people,
+    )
+    assert merged == {"best director": ["Tina Fey", "Amy Poehler"], "best actor": []}
@@ -0,0 +1,39 @@
+import pytest
+
+from tags import TAGS, tag_texts
+
+# every word the regex-backed gates list; the automaton literals have to find each of them,
+# or the tag drops tweets the old regex gate kept
+REGEX_WORDS = {
+    "host": ["host", "hosts", "hosting", "hosted", "your hosts", "our hosts", "please welcome",
+             "opening monologue"],
+    "humor": ["lol", "lmao", "lmfao", "rofl", "haha", "hahaha", "hehe", "hehehe", "funny", "hilarious",
+              "joke", "jokes", "joked", "joking", "roast", "burn", "zinger"],
+    "red_carpet": ["red carpet", "#redcarpet", "#eredcarpet", "manicam", "mani cam", "arrival", "arrivals"],
+    "outfit": ["dress", "gown", "tux", "suit", "outfit", "look", "train", "sequin", "sequins", "lace",
+               "neckline", "hem", "fit", "tailor", "style", "styled"],
+    "performance": ["performance", "perform", "sing", "monologue", "speech"],
+    "win_verb": ["win", "won", "wins", "goes to", "award goes to", "takes home"],
+    "win_negated": ["should won", "should have won", "robbed", "snubbed", "didn't win", "didn’t win",
+                    "did not win", "deserved to win"],
+    "win_future": ["will win", "should win"],
+}
+
+CONTEXTS = ["{}", "{}!", "he was {} about it", "So {} tonight", "{}s", "un{}", "#{}", "{} #GoldenGlobes"]
+
+
+def sentences(word):
+    for ctx in CONTEXTS:
+        s = ctx.format(word)
+        yield s
+        yield s.upper()
+        yield s.title()
+
+
+@pytest.mark.parametrize("tag", [t for t in TAGS if t.regex is not None], ids=lambda t: t.name)
+def test_literals_cover_regex(tag):
+    assert tag.name in REGEX_WORDS
+    for word in REGEX_WORDS[tag.name]:
+        for s in sentences(word):
+            assert bool(tag_texts(s) & tag.bit) == bool(tag.regex.search(s)), s
+
@@ -0,0 +1,390 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tags import TAGS_VERSION, tag_texts
+
+# columnar copy of tweets_cleaned.jsonl written by pre_ceremony()
+# every column is a flat little-endian file so re-reading the corpus is a memory map
+# instead of a json decode per line:
+#   <name>.i64               int64 column (missing -> -1)
+#   <name>.str + <name>.off  utf-8 blob + int64 offsets (rows + 1 entries)
+#   time.ms + time.rows      timestamp_ms sorted ascending + the row each stamp belongs to
+#   tags.i64                 topic bitmask per row (tags.py), trusted while meta "tags_version" matches
+
+STORE_VERSION = 1
+MISSING = -1
+
+INT_COLUMNS = ("id", "timestamp_ms", "user_id")
+STR_COLUMNS = ("screen_name", "text", "text_original")
+COLUMNS = INT_COLUMNS + STR_COLUMNS
+
+_FLUSH_EVERY = 4096
+_SWAP = sys.byteorder == "big"
+
+
+def store_dir_for(jsonl_path: str) -> str:
+    # tweets_cleaned.jsonl -> tweets_cleaned.store/
+    root, _ = os.path.splitext(jsonl_path)
+    return root + ".store"
+
+
+def iso_to_ms(ts: Optional[str]) -> int:
+    if not ts:
+        return MISSING
+    try:
+        return int(round(datetime.fromisoformat(ts).timestamp() * 1000))
+    except Exception:
+        return MISSING
+
+
+def dt_to_ms(dt: datetime) -> int:
+    # smallest whole millisecond >= dt, in integer arithmetic so window edges are exact
+    # (dt >= start  <=>  ms >= dt_to_ms(start) for any tweet stamped to the millisecond)
+    us = int(dt.replace(microsecond=0).timestamp()) * 1_000_000 + dt.microsecond
+    return -(-us // 1000)
+
+
+def _as_int(v) -> int:
+    try:
+        return int(v) if v is not None else MISSING
+    except (TypeError, ValueError):
+        return MISSING
+
+
+class TweetStoreWriter:
+    """Append cleaned tweet records and write them out column by column."""
+
+    def __init__(self, store_dir: str, append: bool = False):
+        """append=True continues an existing, complete store instead of starting over."""
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        meta_path = os.path.join(store_dir, "meta.json")
+        rows = 0
+        # rows whose tag masks can be kept as they are
+        self._tagged = 0
+        if append:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                old = json.load(f)
+            rows = int(old["rows"])
+            if old.get("tags_version") == TAGS_VERSION:
+                self._tagged = rows
+        # drop the old meta first so a half-written store never looks valid
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        self.rows = rows
+        self._ints = {c: array("q") for c in INT_COLUMNS}
+        self._offs = {c: array("q") if append else array("q", [0]) for c in STR_COLUMNS}
+        self._pos = {c: 0 for c in STR_COLUMNS}
+        self._files = {}
+        mode = "r+b" if append else "wb"
+        for c in INT_COLUMNS:
+            self._files[c] = self._open(c + ".i64", mode, rows * 8)
+        for c in STR_COLUMNS:
+            off = self._open(c + ".off", mode, (rows + 1) * 8)
+            if append:
+                # continue the blob from the last recorded offset
+                off.seek(rows * 8)
+                last = array("q")
+                last.frombytes(off.read(8))
+                if _SWAP:
+                    last.byteswap()
+                self._pos[c] = last[0]
+            self._files[c + ".off"] = off
+            self._files[c] = self._open(c + ".str", mode, self._pos[c])
+
+    def _open(self, name: str, mode: str, keep: int):
+        # in append mode cut anything past what meta.json vouches for, then write from there
+        f = open(os.path.join(self.store_dir, name), mode)
+        if mode != "wb":
+            f.truncate(keep)
+            f.seek(keep)
+        return f
+
+    def append(self, rec: dict, ts_ms: Optional[int] = None) -> None:
+        self._ints["id"].append(_as_int(rec.get("id")))
+        self._ints["timestamp_ms"].append(ts_ms if ts_ms is not None else iso_to_ms(rec.get("timestamp")))
+        self._ints["user_id"].append(_as_int(rec.get("user_id")))
+        for c in STR_COLUMNS:
+            b = (rec.get(c) or "").encode("utf-8")
+            self._files[c].write(b)
+            self._pos[c] += len(b)
+            self._offs[c].append(self._pos[c])
+        self.rows += 1
+        if self.rows % _FLUSH_EVERY == 0:
+            self._flush()
+
+    def _flush(self) -> None:
+        for c, arr in self._ints.items():
+            if _SWAP:
+                arr.byteswap()
+            arr.tofile(self._files[c])
+            self._ints[c] = array("q")
+        for c, arr in self._offs.items():
+            if _SWAP:
+                arr.byteswap()
+            arr.tofile(self._files[c + ".off"])
+            self._offs[c] = array("q")
+
+    def close(self, source_path: Optional[str] = None) -> None:
+        self._flush()
+        for f in self._files.values():
+            f.close()
+        # rebuilt from the whole column so appended runs stay sorted
+        stamps = np.fromfile(os.path.join(self.store_dir, "timestamp_ms.i64"), dtype="<i8", count=self.rows)
+        TimeIndex.build(stamps).save(self.store_dir)
+        write_tags(self.store_dir, self.rows, keep=self._tagged)
+        meta = {
+            "version": STORE_VERSION,
+            "rows": self.rows,
+            "int_columns": list(INT_COLUMNS),
+            "str_columns": list(STR_COLUMNS),
+            "time_index": True,
+            "tags_version": TAGS_VERSION,
+            # lets readers notice when the jsonl was rewritten by something else
+            "source_size": os.path.getsize(source_path) if source_path and os.path.exists(source_path) else None,
+        }
+        with open(os.path.join(self.store_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+def tag_rows(store_dir: str, rows: int, start: int = 0) -> np.ndarray:
+    """Topic bitmasks of rows [start, rows), from the text columns."""
+    text = StringColumn(os.path.join(store_dir, "text.str"), os.path.join(store_dir, "text.off"), rows)
+    orig = StringColumn(os.path.join(store_dir, "text_original.str"),
+                        os.path.join(store_dir, "text_original.off"), rows)
+    idx = range(start, rows)
+    return np.fromiter((tag_texts(a, b) for a, b in zip(text.take(idx), orig.take(idx))),
+                       dtype="<i8", count=rows - start)
+
+
+def write_tags(store_dir: str, rows: int, keep: int = 0) -> np.ndarray:
+    """Write tags.i64 for every row; the first `keep` rows are already tagged by this tagger."""
+    path = os.path.join(store_dir, "tags.i64")
+    old = np.fromfile(path, dtype="<i8", count=keep) if keep else np.empty(0, dtype="<i8")
+    tags = np.concatenate([old, tag_rows(store_dir, rows, keep)])
+    tags.tofile(path)
+    return tags
+
+
+class TimeIndex:
+    """Tweet timestamps in sorted order, each pointing back at its row.
+
+    Window queries are two binary searches instead of a scan over the corpus.
+    Tweets without a timestamp are left out.
+    """
+
+    def __init__(self, stamps: np.ndarray, rows: np.ndarray):
+        self.stamps = stamps    # int64 epoch ms, ascending
+        self.rows = rows        # int64 row numbers, same length
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    @classmethod
+    def build(cls, stamps_ms) -> "TimeIndex":
+        stamps_ms = np.asarray(stamps_ms, dtype="<i8")
+        rows = np.flatnonzero(stamps_ms != MISSING)
+        # stable, so tweets with the same stamp keep file order
+        order = np.argsort(stamps_ms[rows], kind="stable")
+        rows = rows[order].astype("<i8")
+        return cls(stamps_ms[rows], rows)
+
+    def save(self, store_dir: str) -> None:
+        self.stamps.astype("<i8").tofile(os.path.join(store_dir, "time.ms"))
+        self.rows.astype("<i8").tofile(os.path.join(store_dir, "time.rows"))
+
+    @classmethod
+    def open(cls, store_dir: str) -> "TimeIndex":
+        n = os.path.getsize(os.path.join(store_dir, "time.ms")) // 8
+        if n == 0:
+            empty = np.empty(0, dtype="<i8")
+            return cls(empty, empty)
+        return cls(
+            np.memmap(os.path.join(store_dir, "time.ms"), dtype="<i8", mode="r", shape=(n,)),
+            np.memmap(os.path.join(store_dir, "time.rows"), dtype="<i8", mode="r", shape=(n,)),
+        )
+
+    def span(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        # positions in the sorted arrays covering [start_ms, end_ms)
+        lo = int(np.searchsorted(self.stamps, start_ms, side="left"))
+        hi = int(np.searchsorted(self.stamps, end_ms, side="left"))
+        return lo, max(lo, hi)
+
+    def rows_between(self, start: datetime, end: datetime) -> np.ndarray:
+        """Rows with start <= timestamp < end, in file order."""
+        lo, hi = self.span(dt_to_ms(start), dt_to_ms(end))
+        return np.sort(self.rows[lo:hi])
+
+    def count_between(self, start: datetime, end: datetime) -> int:
+        lo, hi = self.span(dt_to_ms(start), dt_to_ms(end))
+        return hi - lo
+
+
+class StringColumn:
+    """Read-only, memory mapped column of utf-8 strings."""
+
+    def __init__(self, blob_path: str, off_path: str, rows: int):
+        self.rows = rows
+        self.offsets = np.memmap(off_path, dtype="<i8", mode="r", shape=(rows + 1,))
+        size = int(self.offsets[-1])
+        self._mm = b""
+        if size:
+            # the mapping stays valid after the file is closed, so no descriptor is held
+            with open(blob_path, "rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = b""
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        return self._mm[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        mm = self._mm
+        offs = self.offsets.tolist()
+        for a, b in zip(offs, offs[1:]):
+            yield mm[a:b].decode("utf-8")
+
+    def take(self, idx: Sequence[int]) -> List[str]:
+        mm, offs = self._mm, self.offsets
+        return [mm[int(offs[i]):int(offs[i + 1])].decode("utf-8") for i in idx]
+
+    def tolist(self) -> List[str]:
+        return list(self)
+
+
+class TweetStore:
+    def __init__(self, store_dir: str, meta: dict):
+        self.store_dir = store_dir
+        self.meta = meta
+        self.rows = int(meta["rows"])
+        self._cache = {}
+
+    def close(self) -> None:
+        # unmap the string columns; the store can be reopened with open_store()
+        for col in self._cache.values():
+            if isinstance(col, StringColumn):
+                col.close()
+        self._cache.clear()
+
+    def __enter__(self) -> "TweetStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def column(self, name: str):
+        if name in self._cache:
+            return self._cache[name]
+        if name in self.meta["int_columns"]:
+            path = os.path.join(self.store_dir, name + ".i64")
+            if self.rows:
+                col = np.memmap(path, dtype="<i8", mode="r", shape=(self.rows,))
+            else:
+                col = np.empty(0, dtype="<i8")
+        elif name in self.meta["str_columns"]:
+            col = StringColumn(
+                os.path.join(self.store_dir, name + ".str"),
+                os.path.join(self.store_dir, name + ".off"),
+                self.rows,
+            )
+        else:
+            raise KeyError(f"unknown column {name!r}")
+        self._cache[name] = col
+        return col
+
+    def columns(self, names: Sequence[str]) -> Dict[str, object]:
+        return {n: self.column(n) for n in names}
+
+    def time_index(self) -> TimeIndex:
+        if "time_index" not in self._cache:
+            if self.meta.get("time_index"):
+                self._cache["time_index"] = TimeIndex.open(self.store_dir)
+            else:
+                # store written before the index existed
+                self._cache["time_index"] = TimeIndex.build(self.column("timestamp_ms"))
+        return self._cache["time_index"]
+
+    def tags(self) -> np.ndarray:
+        """Topic bitmask of every row (see tags.py)."""
+        if "tags" not in self._cache:
+            if self.meta.get("tags_version") == TAGS_VERSION and self.rows:
+                path = os.path.join(self.store_dir, "tags.i64")
+                self._cache["tags"] = np.memmap(path, dtype="<i8", mode="r", shape=(self.rows,))
+            else:
+                # written before the tags (or with other keywords); pre_ceremony() refreshes them
+                self._cache["tags"] = tag_rows(self.store_dir, self.rows)
+        return self._cache["tags"]
+
+    def refresh_tags(self) -> np.ndarray:
+        """Re-tag every row on disk and record it in meta.json."""
+        tags = write_tags(self.store_dir, self.rows)
+        self.meta["tags_version"] = TAGS_VERSION
+        with open(os.path.join(self.store_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        self._cache["tags"] = tags
+        return tags
+
+
+def open_store(jsonl_path: str) -> Optional[TweetStore]:
+    """Return the columnar store next to jsonl_path, or None if missing or stale."""
+    store_dir = store_dir_for(jsonl_path)
+    meta_path = os.path.join(store_dir, "meta.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get("version") != STORE_VERSION:
+        return None
+    size = meta.get("source_size")
+    if os.path.exists(jsonl_path) and size is not None and os.path.getsize(jsonl_path) != size:
+        return None
+    return TweetStore(store_dir, meta)
+
+
+def load_columns(jsonl_path: str, names: Sequence[str]) -> Dict[str, object]:
+    """Load just the named columns, from the store if it's there, else from the jsonl."""
+    store = open_store(jsonl_path)
+    if store is not None:
+        return store.columns(names)
+
+    # fallback: one pass over the jsonl keeping only what was asked for
+    out = {n: [] for n in names}
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            for n in names:
+                if n == "timestamp_ms":
+                    out[n].append(iso_to_ms(rec.get("timestamp")))
+                elif n in INT_COLUMNS:
+                    out[n].append(_as_int(rec.get(n)))
+                else:
+                    out[n].append(rec.get(n) or "")
+    return out
+
+
+def load_texts(jsonl_path: str, column: str = "text") -> List[str]:
+    return list(load_columns(jsonl_path, [column])[column])
@@ -1,31 +1,15 @@
-import json, re
+import re
 from collections import Counter, defaultdict
-from typing import Dict, List, Iterable, Tuple
-
-# patterns to look for
-win_verbs = [
-    r"\bwin\b",
-    r"\bwon\b",
-    r"\bwins\b",
-    r"\bgoes to\b",
-    r"\baward goes to\b",
-    r"\btakes home\b"]
-#matches exactly the word win, wins, goes to, award goes to, takes home
-win_re = re.compile(
-    "|".join(win_verbs), 
-    flags=re.IGNORECASE)
-#matches with tweets that match with the winning verbs
+from typing import Dict, List, Tuple
 
-negation_re = re.compile(
-    r"\b(should(?:\s+have)?\s+won|robbed|snubbed|did(?:n['’]t| not)\s+win|deserved to win)\b",
-    flags= re.IGNORECASE)
-#matches with cases we want to ignore - when they didnt win
-    #should have won or should won
+from corpus import get_corpus
+from tags import WIN_FUTURE, WIN_NEGATED, WIN_VERB, Automaton, win_re
 
-future_re = re.compile(
-    r"\b(will|should)\s+win\b",
-    flags=re.IGNORECASE)
-#matches will win or should win - not decided yet so we should exclude
+# patterns to look for live in tags.py - every tweet comes tagged once:
+#win_re (WIN_VERB) matches exactly the word win, wins, goes to, award goes to, takes home
+#negation_re (WIN_NEGATED) matches with cases we want to ignore - when they didnt win
+    #should have won or should won
+#future_re (WIN_FUTURE) matches will win or should win - not decided yet so we should exclude
 
 candidate_window = 120
 candidate_span = re.compile(
@@ -35,14 +19,6 @@ candidate_span = re.compile(
     #easier to look through/find winners out of
 
 #helper functions
-def load_clean_tweets(path: str) -> Iterable[dict]: 
-    #want it to be a generator so we dont just return all tweets in a list
-    #loads tweets - yields a dict
-    with open(path, "r", encoding = "utf-8") as f:
-        for line in f:
-            if line.strip():
-                yield json.loads(line)
-
 def set_window(text:str, index:int, w:int = candidate_window ) -> str:
     #takes text and returns portion of it based on the window size
         #if Won is found in tweet then returns section around that
@@ -98,14 +74,18 @@ award_stop = {
     "–","-","television","tv","series","motion","picture"
 }
 
+def award_words(award: str) -> List[str]:
+    #the meaningful words of an award name (repeats kept)
+    award_c = award.lower().replace("-", " ")
+    return [w for w in award_c.split() if w and w not in award_stop]
+
 def tweet_mentions_award(text, award):
     #best and at least 2 meaningful words
     text_l = text.lower()
     if "best" not in text_l:
         return (False, 10**9)
     
-    award_c = award.lower().replace("-", " ")
-    words = [w for w in award_c.split() if w and w not in award_stop]
+    words = award_words(award)
     matched = [w for w in words if w in text_l]
     if len(matched)<2:
         return(False, 10**9)
@@ -113,6 +93,48 @@ def tweet_mentions_award(text, award):
     index = min((text_l.find(w) for w in matched), default = 10**9)
     return (True, index)
 
+class AwardKeywords:
+    """tweet_mentions_award for every award at once.
+
+    the award words are built once, with each word -> the awards it's in (and how many times);
+    one automaton pass over a tweet finds which words occur, and only those words' awards
+    get counted - the cost depends on the words in the tweet, not awards x words per award
+    """
+
+    def __init__(self, awards: List[str]):
+        self.awards = list(awards)
+        self.words: List[str] = []
+        self.postings: List[List[Tuple[int, int]]] = []     #word id -> [(award position, times in award)]
+        ids: Dict[str, int] = {}
+        for a, award in enumerate(self.awards):
+            for w, n in Counter(award_words(award)).items():
+                if w not in ids:
+                    ids[w] = len(self.words)
+                    self.words.append(w)
+                    self.postings.append([])
+                self.postings[ids[w]].append((a, n))
+        self.automaton = Automaton({w: 1 << k for k, w in enumerate(self.words)})
+
+    def mentions(self, text: str) -> List[Tuple[str, int]]:
+        #(award, index) for every award tweet_mentions_award finds, in awards order
+        text_l = text.lower()
+        if "best" not in text_l:
+            return []
+        bits = self.automaton.scan(text_l)
+        matched: Dict[int, int] = defaultdict(int)
+        index: Dict[int, int] = {}
+        k = 0
+        while bits:
+            if bits & 1:
+                pos = text_l.find(self.words[k])
+                for a, n in self.postings[k]:
+                    matched[a] += n
+                    if pos < index.get(a, 10**9):
+                        index[a] = pos
+            bits >>= 1
+            k += 1
+        return [(self.awards[a], index[a]) for a in sorted(matched) if matched[a] >= 2]
+
 award_lex = re.compile(r"\b(best|golden globe[s]?|award|goes to|wins?|won|category)\b", re.IGNORECASE)
 cand_chars = r"[a-z0-9&'().,:!\-\s]{2,}"
 
@@ -159,12 +181,11 @@ def find_winners (cleaned_path: str, awards: List[str], drop_retweets: bool=True
     scores: Dict[str, Counter] = {a: Counter() for a in awards}
     #for each award, keep a counter of candidate and their score
 
-    count = 0
-    for tweet in load_clean_tweets(cleaned_path):
-        count += 1
-    print(f"Loaded {count} tweets from {cleaned_path}")
+    corpus = get_corpus(cleaned_path)
+    keywords = AwardKeywords(awards)
+    print(f"Loaded {len(corpus)} tweets from {cleaned_path}")
 
-    for tweet in load_clean_tweets(cleaned_path):
+    for tweet in corpus:
         if drop_retweets and tweet.get("is_retweet"):
             continue
         
@@ -172,21 +193,17 @@ def find_winners (cleaned_path: str, awards: List[str], drop_retweets: bool=True
         if not text:
             continue
 
-        m = win_re.search(text)
-        if not m:
+        if not tweet.tags & WIN_VERB:
             continue #doesnt have something to do with winning
-        if negation_re.search(text) or future_re.search(text):
+        if tweet.tags & (WIN_NEGATED | WIN_FUTURE):
             continue #has something about not winnning or shouldve won
+        m = win_re.search(text) #where the win verb is
 
         candidates = get_x(text, m.start())
         if not candidates:
             continue
     
-        for award in awards:
-            found, a_index = tweet_mentions_award(text, award)
-            if not found:
-                continue
-            
+        for award, a_index in keywords.mentions(text):
             dist = abs(a_index - m.start())
             base = pattern_weight(m.group(0))+ (2 if dist < 80 else 0) + (1 if dist < 140 else 0)
 